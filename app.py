@@ -3,10 +3,18 @@ from flask import Flask, render_template, send_from_directory, jsonify
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
 from flask_cors import CORS
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 import os
 from dotenv import load_dotenv
 import logging
+import math
+import json
+from collections import namedtuple
+import base64
+import io
+import re
+from collections import Counter
+from backend.utils.leader_lock import AdvisoryLeaderLock, FileLeaderLock
 
 # Load environment variables
 load_dotenv()
@@ -19,6 +27,47 @@ app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'your_super_secret_devel
 app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///plant_care.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.config['WTF_CSRF_ENABLED'] = False  # Disable CSRF for API
+app.config['CSV_IMPORT_ENGINE'] = os.environ.get('CSV_IMPORT_ENGINE', 'pandas')  # 'pandas' or 'csv'
+app.config['IMPORT_WORKERS'] = int(os.environ.get('IMPORT_WORKERS', 2))
+app.config['IMPORT_SPOOL_DIR'] = os.environ.get('IMPORT_SPOOL_DIR', os.path.join(app.instance_path, 'imports'))
+app.config['RETENTION_INTERVAL'] = int(os.environ.get('RETENTION_INTERVAL', 300))  # seconds
+app.config['RETENTION_CHUNK_SIZE'] = int(os.environ.get('RETENTION_CHUNK_SIZE', 5000))
+app.config['WEATHER_PROVIDER'] = os.environ.get('WEATHER_PROVIDER', 'simulated')  # 'simulated' or 'weatherapi'
+app.config['WEATHER_API_KEY'] = os.environ.get('WEATHER_API_KEY')
+app.config['WEATHER_API_URL'] = os.environ.get('WEATHER_API_URL')  # e.g. a local stub server
+app.config['WEATHER_CACHE_TTL'] = int(os.environ.get('WEATHER_CACHE_TTL', 600))  # seconds
+app.config['WEATHER_CACHE_SIZE'] = int(os.environ.get('WEATHER_CACHE_SIZE', 1024))
+# Refresh weather for gardens with coordinates before their cache entries expire
+app.config['WEATHER_PREFETCH_INTERVAL'] = int(os.environ.get('WEATHER_PREFETCH_INTERVAL', 300))  # seconds
+app.config['WEATHER_PREFETCH_WORKERS'] = int(os.environ.get('WEATHER_PREFETCH_WORKERS', 8))
+# 'sync' commits each add_reading; 'buffered' group-commits them from a write-behind buffer
+app.config['INGEST_MODE'] = os.environ.get('INGEST_MODE', 'sync')
+# Buffered mode only: 'flush' answers once the reading is committed, 'enqueue' as soon as it is queued
+app.config['INGEST_DURABILITY'] = os.environ.get('INGEST_DURABILITY', 'flush')
+app.config['INGEST_FLUSH_ROWS'] = int(os.environ.get('INGEST_FLUSH_ROWS', 500))
+app.config['INGEST_FLUSH_INTERVAL_MS'] = int(os.environ.get('INGEST_FLUSH_INTERVAL_MS', 50))
+app.config['INGEST_BUFFER_CAPACITY'] = int(os.environ.get('INGEST_BUFFER_CAPACITY', 10000))
+app.config['INGEST_ENQUEUE_TIMEOUT_MS'] = int(os.environ.get('INGEST_ENQUEUE_TIMEOUT_MS', 100))
+# 'wal' applies the SQLite concurrency settings below; 'off' leaves SQLite at its defaults
+app.config['SQLITE_MODE'] = os.environ.get('SQLITE_MODE', 'wal')
+app.config['SQLITE_BUSY_TIMEOUT_MS'] = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000))
+# 'monthly' range-partitions plant_readings by timestamp on PostgreSQL; other databases ignore it
+app.config['READINGS_PARTITIONING'] = os.environ.get('READINGS_PARTITIONING', 'off')
+app.config['READINGS_PARTITIONS_AHEAD'] = int(os.environ.get('READINGS_PARTITIONS_AHEAD', 2))  # months
+# Whole months of readings kept when partitioned; older partitions are dropped (0 keeps them all)
+app.config['READINGS_PARTITION_KEEP_MONTHS'] = int(os.environ.get('READINGS_PARTITION_KEEP_MONTHS', 0))
+# Seconds a process may serve a cached user record or garden ownership set
+app.config['AUTH_CACHE_TTL'] = int(os.environ.get('AUTH_CACHE_TTL', 60))
+# Add an X-Query-Count header (SQL statements run by the request) to every non-streamed response
+app.config['QUERY_COUNT_HEADER'] = os.environ.get('QUERY_COUNT_HEADER', 'false').lower() == 'true'
+# Leader lock for the background runner when the database is not PostgreSQL (one host only)
+app.config['BACKGROUND_LOCK_FILE'] = os.environ.get('BACKGROUND_LOCK_FILE',
+                                                    os.path.join(app.instance_path, 'background.lock'))
+# Policies used for sensor types without a retention_policies row
+app.config['RETENTION_DEFAULTS'] = json.loads(os.environ.get(
+    'RETENTION_DEFAULTS',
+    '{"simulated_basic": {"keep_rows": 1000}, "simulated_full": {"keep_rows": 1000}}'
+))
 
 # Initialize extensions
 db = SQLAlchemy(app)
@@ -27,6 +76,68 @@ login_manager.init_app(app)
 login_manager.login_view = 'auth.login'
 CORS(app, supports_credentials=True, origins=['http://localhost:3000', 'http://127.0.0.1:3000'])
 
+# SQLite concurrency mode
+import sqlite3
+import threading
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.pool import Pool
+
+# Applied to every new SQLite connection. WAL lets readers proceed while one
+# connection writes; NORMAL sync is durable across crashes of the app in WAL.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -64000,  # KiB, i.e. 64 MB
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+    'busy_timeout': app.config['SQLITE_BUSY_TIMEOUT_MS'],
+}
+SQLITE_WRITE_STATEMENTS = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE', 'CREATE', 'DROP', 'ALTER')
+
+# Only one connection of the pool may hold a write transaction at a time.
+# SQLite allows a single writer anyway; taking turns here means writers queue
+# in-process instead of failing with "database is locked" when a busy
+# timeout runs out, while reads keep using every pooled connection.
+sqlite_write_lock = threading.Lock()
+SQLITE_WRITE_LOCK_KEY = 'holds_sqlite_write_lock'
+
+def sqlite_mode_enabled(dbapi_connection):
+    return app.config['SQLITE_MODE'] == 'wal' and isinstance(dbapi_connection, sqlite3.Connection)
+
+@event.listens_for(Engine, 'connect')
+def apply_sqlite_pragmas(dbapi_connection, connection_record):
+    if not sqlite_mode_enabled(dbapi_connection):
+        return
+    cursor = dbapi_connection.cursor()
+    for pragma, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f'PRAGMA {pragma} = {value}')
+    cursor.close()
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def acquire_sqlite_write_lock(conn, cursor, statement, parameters, context, executemany):
+    if conn.info.get(SQLITE_WRITE_LOCK_KEY) or not sqlite_mode_enabled(conn.connection.dbapi_connection):
+        return
+    if statement.lstrip()[:7].upper().startswith(SQLITE_WRITE_STATEMENTS):
+        if not sqlite_write_lock.acquire(timeout=app.config['SQLITE_BUSY_TIMEOUT_MS'] / 1000):
+            raise OperationalError(statement, parameters, sqlite3.OperationalError('database is locked'))
+        conn.info[SQLITE_WRITE_LOCK_KEY] = True
+
+def release_sqlite_write_lock(info):
+    if info.pop(SQLITE_WRITE_LOCK_KEY, False):
+        sqlite_write_lock.release()
+
+@event.listens_for(Engine, 'commit')
+@event.listens_for(Engine, 'rollback')
+def end_sqlite_write_transaction(conn):
+    release_sqlite_write_lock(conn.info)
+
+@event.listens_for(Pool, 'reset')
+def reset_sqlite_write_transaction(dbapi_connection, connection_record, reset_state):
+    # A connection returned to the pool mid-transaction is rolled back
+    release_sqlite_write_lock(connection_record.info)
+
 # Logging configuration
 logging.basicConfig(level=logging.INFO)
 
@@ -51,7 +162,8 @@ class User(UserMixin, db.Model):
     light_min = db.Column(db.Integer, default=200)  # lux
     
     # Relationships
-    gardens = db.relationship('Garden', backref='owner', lazy=True, cascade='all, delete-orphan')
+    gardens = db.relationship('Garden', backref='owner', lazy=True, cascade='all, delete-orphan',
+                              foreign_keys='Garden.user_id')
     
     def __repr__(self):
         return f'<User {self.username}>'
@@ -74,6 +186,8 @@ class User(UserMixin, db.Model):
 
 class Garden(db.Model):
     __tablename__ = 'gardens'
+    # Never reuse a deleted garden's id: the ownership cache trusts ids it has seen
+    __table_args__ = {'sqlite_autoincrement': True}
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -91,12 +205,16 @@ class Garden(db.Model):
     
     # Relationships
     readings = db.relationship('PlantReading', backref='garden_obj', lazy=True, cascade='all, delete-orphan')
+    stats = db.relationship('GardenStats', backref='garden', uselist=False, lazy='joined', cascade='all, delete-orphan')
+    import_jobs = db.relationship('ImportJob', backref='garden', lazy=True, cascade='all, delete-orphan')
+    retention_policy = db.relationship('RetentionPolicy', backref='garden', uselist=False, cascade='all, delete-orphan')
+    rollups = db.relationship('ReadingRollup', backref='garden', lazy=True, cascade='all, delete-orphan')
     
     def __repr__(self):
         return f'<Garden {self.name}>'
     
     def to_dict(self):
-        latest_reading = PlantReading.query.filter_by(garden_id=self.id).order_by(PlantReading.timestamp.desc()).first()
+        latest_reading = self.stats.latest_reading if self.stats else None
         return {
             'id': self.id,
             'name': self.name,
@@ -109,15 +227,20 @@ class Garden(db.Model):
             'plant_type': self.plant_type,
             'watering_frequency': self.watering_frequency,
             'latest_reading': latest_reading.to_dict() if latest_reading else None,
-            'readings_count': len(self.readings)
+            'readings_count': self.stats.readings_count if self.stats else 0
         }
 
+# Monthly range partitions of plant_readings (see "Reading partitions" below)
+PARTITION_READINGS = (app.config['READINGS_PARTITIONING'] == 'monthly'
+                      and make_url(app.config['SQLALCHEMY_DATABASE_URI']).get_backend_name() == 'postgresql')
+
 class PlantReading(db.Model):
     __tablename__ = 'plant_readings'
     
-    id = db.Column(db.Integer, primary_key=True)
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     garden_id = db.Column(db.Integer, db.ForeignKey('gardens.id'), nullable=False)
-    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    # A partitioned table's primary key must contain the partition key
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow, primary_key=PARTITION_READINGS)
     moisture_level = db.Column(db.Float, nullable=False)  # percentage
     temperature = db.Column(db.Float, nullable=False)  # celsius
     light_intensity = db.Column(db.Float, nullable=False)  # lux
@@ -126,6 +249,15 @@ class PlantReading(db.Model):
     notes = db.Column(db.Text, nullable=True)
     is_manual = db.Column(db.Boolean, default=False)
     
+    # Every hot query filters on garden_id and walks timestamp order; id breaks
+    # ties between readings that share a timestamp
+    __table_args__ = (
+        db.Index('ix_plant_readings_garden_timestamp', 'garden_id', 'timestamp', 'id'),
+        {'postgresql_partition_by': 'RANGE ("timestamp")'} if PARTITION_READINGS else {},
+    )
+    # Readings are identified by id alone, whatever the table's primary key
+    __mapper_args__ = {'primary_key': [id]}
+    
     def __repr__(self):
         return f'<Reading {self.timestamp} for Garden {self.garden_id}>'
     
@@ -143,10 +275,604 @@ class PlantReading(db.Model):
             'is_manual': self.is_manual
         }
 
+READING_VALUE_COLUMNS = ('moisture_level', 'temperature', 'light_intensity', 'humidity', 'ph_level')
+
+class ImportJob(db.Model):
+    __tablename__ = 'import_jobs'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    garden_id = db.Column(db.Integer, db.ForeignKey('gardens.id'), nullable=False)
+    filename = db.Column(db.String(255), nullable=True)
+    status = db.Column(db.String(20), default='queued')  # queued, running, completed, failed
+    rows_inserted = db.Column(db.Integer, default=0)
+    rows_rejected = db.Column(db.Integer, default=0)
+    batches = db.Column(db.Integer, default=0)
+    errors = db.Column(db.Text, nullable=True)  # JSON list of sample row errors
+    message = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    
+    def __repr__(self):
+        return f'<ImportJob {self.id} {self.status}>'
+    
+    def to_dict(self):
+        rows_inserted = self.rows_inserted or 0
+        rows_rejected = self.rows_rejected or 0
+        return {
+            'id': self.id,
+            'garden_id': self.garden_id,
+            'filename': self.filename,
+            'status': self.status,
+            'rows_parsed': rows_inserted + rows_rejected,
+            'rows_inserted': rows_inserted,
+            'rows_rejected': rows_rejected,
+            'batches': self.batches or 0,
+            'errors': json.loads(self.errors) if self.errors else [],
+            'message': self.message,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+class RetentionPolicy(db.Model):
+    """How long readings are kept, for one garden or for every garden of a sensor type.
+    
+    Readings older than keep_days, or beyond the newest keep_rows, expire.
+    Expired readings are deleted, or with downsample set to 'hourly' or
+    'daily' they are replaced by one averaged reading per bucket.
+    """
+    __tablename__ = 'retention_policies'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    garden_id = db.Column(db.Integer, db.ForeignKey('gardens.id'), nullable=True, unique=True)
+    sensor_type = db.Column(db.String(50), nullable=True, unique=True)
+    keep_rows = db.Column(db.Integer, nullable=True)
+    keep_days = db.Column(db.Integer, nullable=True)
+    downsample = db.Column(db.String(10), nullable=True)
+    
+    def __repr__(self):
+        return f'<RetentionPolicy {self.garden_id or self.sensor_type}>'
+    
+    def to_rule(self):
+        return RetentionRule(self.keep_rows, self.keep_days, self.downsample)
+
+def garden_readings_query(garden_id, newest_first=True):
+    """Readings of one garden in (timestamp, id) order, served by the composite index."""
+    if newest_first:
+        order = (PlantReading.timestamp.desc(), PlantReading.id.desc())
+    else:
+        order = (PlantReading.timestamp.asc(), PlantReading.id.asc())
+    return PlantReading.query.filter_by(garden_id=garden_id).order_by(*order)
+
+def readings_before(query, cursor):
+    """Seek past a keyset cursor on the (timestamp, id) ordering of the composite index."""
+    timestamp, reading_id = cursor
+    # The plain timestamp bound is redundant, but PostgreSQL only prunes
+    # partitions on scalar comparisons, not on row values
+    return query.filter(PlantReading.timestamp <= timestamp,
+                        db.tuple_(PlantReading.timestamp, PlantReading.id) < (timestamp, reading_id))
+
+def encode_reading_cursor(reading):
+    raw = f'{reading.timestamp.isoformat()},{reading.id}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+def decode_reading_cursor(cursor):
+    """Inverse of encode_reading_cursor; raises ValueError on anything malformed."""
+    raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+    timestamp, reading_id = raw.rsplit(',', 1)
+    return datetime.fromisoformat(timestamp), int(reading_id)
+
+class GardenStats(db.Model):
+    """Denormalized per-garden summary, kept current by every code path that
+    inserts or deletes readings (see record_new_readings/record_removed_readings)."""
+    __tablename__ = 'garden_stats'
+    
+    garden_id = db.Column(db.Integer, db.ForeignKey('gardens.id'), primary_key=True)
+    readings_count = db.Column(db.Integer, default=0, nullable=False)
+    latest_reading_id = db.Column(db.Integer, nullable=True)
+    
+    latest_reading = db.relationship(
+        'PlantReading',
+        primaryjoin='foreign(GardenStats.latest_reading_id) == PlantReading.id',
+        viewonly=True,
+        lazy='joined'
+    )
+    
+    def __repr__(self):
+        return f'<GardenStats {self.garden_id}: {self.readings_count} readings>'
+
+def garden_summaries(garden_ids):
+    """Latest reading and reading count for many gardens in a single query.
+
+    Returns a dict mapping garden_id -> (latest PlantReading, readings_count);
+    gardens without readings are absent from the result.
+    """
+    if not garden_ids:
+        return {}
+    
+    ranked = db.session.query(
+        PlantReading.id.label('reading_id'),
+        db.func.row_number().over(
+            partition_by=PlantReading.garden_id,
+            order_by=(PlantReading.timestamp.desc(), PlantReading.id.desc())
+        ).label('position'),
+        db.func.count().over(partition_by=PlantReading.garden_id).label('readings_count')
+    ).filter(PlantReading.garden_id.in_(garden_ids)).subquery()
+    
+    rows = db.session.query(PlantReading, ranked.c.readings_count)\
+                     .join(ranked, PlantReading.id == ranked.c.reading_id)\
+                     .filter(ranked.c.position == 1).all()
+    return {reading.garden_id: (reading, count) for reading, count in rows}
+
+def insert_readings(mappings, derived=False):
+    """Bulk-insert reading dicts with one executemany and update garden_stats.
+    
+    Each mapping needs at least garden_id plus the non-null reading columns;
+    the caller owns the transaction. New readings are also folded into the
+    rollups and cached moisture models; derived readings (averages of
+    readings already recorded, as retention writes) are not.
+    """
+    if not mappings:
+        return
+    
+    ensure_reading_partitions_for(mappings)
+    db.session.execute(db.insert(PlantReading), mappings)
+    record_new_readings(Counter(mapping['garden_id'] for mapping in mappings))
+    if not derived:
+        update_rollups(mappings)
+        update_moisture_models(mappings)
+
+def record_new_readings(counts):
+    """Bump garden_stats after inserting readings; counts maps garden_id -> rows added."""
+    _adjust_readings_counts(counts)
+
+def record_removed_readings(counts):
+    """Lower garden_stats after deleting readings; counts maps garden_id -> rows removed."""
+    _adjust_readings_counts({garden_id: -count for garden_id, count in counts.items()})
+
+def _adjust_readings_counts(deltas):
+    deltas = {garden_id: delta for garden_id, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    
+    # Increment in SQL so concurrent writers (simulator and request threads)
+    # never overwrite each other's counts
+    stats = GardenStats.__table__
+    db.session.execute(
+        stats.update()
+             .where(stats.c.garden_id == db.bindparam('stats_garden_id'))
+             .values(readings_count=stats.c.readings_count + db.bindparam('delta')),
+        [{'stats_garden_id': garden_id, 'delta': delta} for garden_id, delta in deltas.items()]
+    )
+    refresh_latest_readings(list(deltas))
+
+def refresh_latest_readings(garden_ids):
+    """Re-point garden_stats.latest_reading_id at each garden's newest reading."""
+    newest = db.session.query(PlantReading.id)\
+                       .filter(PlantReading.garden_id == GardenStats.garden_id)\
+                       .order_by(PlantReading.timestamp.desc(), PlantReading.id.desc())\
+                       .limit(1).correlate(GardenStats).scalar_subquery()
+    GardenStats.query.filter(GardenStats.garden_id.in_(garden_ids))\
+                     .update({GardenStats.latest_reading_id: newest}, synchronize_session=False)
+
+def ensure_garden_stats(batch_size=500):
+    """Create garden_stats rows for gardens that predate the table.
+    
+    Every web worker runs this at startup, so rows another worker inserted
+    in the meantime are skipped (ON CONFLICT DO NOTHING) instead of failing.
+    """
+    missing = [garden_id for (garden_id,) in db.session.query(Garden.id)
+               .outerjoin(GardenStats, GardenStats.garden_id == Garden.id)
+               .filter(GardenStats.garden_id.is_(None)).all()]
+    
+    insert = postgresql.insert if db.session.get_bind().dialect.name == 'postgresql' else sqlite.insert
+    statement = insert(GardenStats.__table__).on_conflict_do_nothing(index_elements=['garden_id'])
+    for start in range(0, len(missing), batch_size):
+        batch = missing[start:start + batch_size]
+        summaries = garden_summaries(batch)
+        rows = []
+        for garden_id in batch:
+            latest_reading, readings_count = summaries.get(garden_id, (None, 0))
+            rows.append({
+                'garden_id': garden_id,
+                'readings_count': readings_count,
+                'latest_reading_id': latest_reading.id if latest_reading else None
+            })
+        db.session.execute(statement, rows)
+        db.session.commit()
+
+# Reading rollups
+import pandas as pd
+from sqlalchemy.dialects import postgresql, sqlite
+
+# Rollup resolutions, keyed by the names ?bucket= accepts
+ROLLUP_BUCKETS = {'1h': timedelta(hours=1), '1d': timedelta(days=1)}
+
+class ReadingRollup(db.Model):
+    """Min/max/sum/count of each reading column for one garden over an hour or a day.
+    
+    Kept current by update_rollups() whenever readings are inserted, so chart
+    ranges read a few hundred buckets instead of every raw reading. Rollups
+    are not touched by retention and outlive the readings they summarise.
+    """
+    __tablename__ = 'reading_rollups'
+    
+    garden_id = db.Column(db.Integer, db.ForeignKey('gardens.id'), primary_key=True)
+    resolution = db.Column(db.String(2), primary_key=True)  # a ROLLUP_BUCKETS key
+    bucket_start = db.Column(db.DateTime, primary_key=True)
+    readings_count = db.Column(db.Integer, default=0, nullable=False)
+    
+    # Sums and counts rather than means, so buckets can be merged incrementally
+    moisture_level_min = db.Column(db.Float, nullable=True)
+    moisture_level_max = db.Column(db.Float, nullable=True)
+    moisture_level_sum = db.Column(db.Float, default=0, nullable=False)
+    moisture_level_count = db.Column(db.Integer, default=0, nullable=False)
+    temperature_min = db.Column(db.Float, nullable=True)
+    temperature_max = db.Column(db.Float, nullable=True)
+    temperature_sum = db.Column(db.Float, default=0, nullable=False)
+    temperature_count = db.Column(db.Integer, default=0, nullable=False)
+    light_intensity_min = db.Column(db.Float, nullable=True)
+    light_intensity_max = db.Column(db.Float, nullable=True)
+    light_intensity_sum = db.Column(db.Float, default=0, nullable=False)
+    light_intensity_count = db.Column(db.Integer, default=0, nullable=False)
+    humidity_min = db.Column(db.Float, nullable=True)
+    humidity_max = db.Column(db.Float, nullable=True)
+    humidity_sum = db.Column(db.Float, default=0, nullable=False)
+    humidity_count = db.Column(db.Integer, default=0, nullable=False)
+    ph_level_min = db.Column(db.Float, nullable=True)
+    ph_level_max = db.Column(db.Float, nullable=True)
+    ph_level_sum = db.Column(db.Float, default=0, nullable=False)
+    ph_level_count = db.Column(db.Integer, default=0, nullable=False)
+    
+    def __repr__(self):
+        return f'<ReadingRollup {self.resolution} {self.bucket_start} for Garden {self.garden_id}>'
+    
+    def to_dict(self):
+        bucket = {
+            'start': self.bucket_start.isoformat(),
+            'readings_count': self.readings_count
+        }
+        for column in READING_VALUE_COLUMNS:
+            count = getattr(self, f'{column}_count')
+            bucket[column] = {
+                'min': getattr(self, f'{column}_min'),
+                'max': getattr(self, f'{column}_max'),
+                'mean': getattr(self, f'{column}_sum') / count if count else None,
+                'count': count
+            }
+        return bucket
+
+def floor_timestamp(timestamp, bucket):
+    return datetime.min + ((timestamp - datetime.min) // bucket) * bucket
+
+# Below this many readings plain Python aggregates faster than pandas' fixed overhead
+ROLLUP_PANDAS_MIN_ROWS = 2000
+
+def update_rollups(mappings):
+    """Fold newly inserted reading dicts into their hourly and daily rollup buckets.
+    
+    The batch is aggregated in memory first, so the database sees one
+    upsert row per touched bucket however many readings arrived.
+    """
+    if len(mappings) >= ROLLUP_PANDAS_MIN_ROWS:
+        upsert_rollups(aggregate_rollups_pandas(mappings))
+    else:
+        upsert_rollups(aggregate_rollups(mappings))
+
+def aggregate_rollups(mappings):
+    received_at = datetime.utcnow()
+    buckets = {}
+    for mapping in mappings:
+        timestamp = mapping.get('timestamp') or received_at
+        for resolution, bucket in ROLLUP_BUCKETS.items():
+            key = (mapping['garden_id'], resolution, floor_timestamp(timestamp, bucket))
+            row = buckets.get(key)
+            if row is None:
+                row = buckets[key] = {'garden_id': key[0], 'resolution': resolution,
+                                      'bucket_start': key[2], 'readings_count': 0}
+                for column in READING_VALUE_COLUMNS:
+                    row.update({f'{column}_min': None, f'{column}_max': None,
+                                f'{column}_sum': 0.0, f'{column}_count': 0})
+            
+            row['readings_count'] += 1
+            for column in READING_VALUE_COLUMNS:
+                value = mapping.get(column)
+                if value is None or value != value:
+                    continue
+                if row[f'{column}_min'] is None or value < row[f'{column}_min']:
+                    row[f'{column}_min'] = value
+                if row[f'{column}_max'] is None or value > row[f'{column}_max']:
+                    row[f'{column}_max'] = value
+                row[f'{column}_sum'] += value
+                row[f'{column}_count'] += 1
+    return list(buckets.values())
+
+def aggregate_rollups_pandas(mappings):
+    frame = pd.DataFrame(mappings, columns=['garden_id', 'timestamp', *READING_VALUE_COLUMNS])
+    frame['timestamp'] = pd.to_datetime(frame['timestamp']).fillna(pd.Timestamp(datetime.utcnow()))
+    frame[list(READING_VALUE_COLUMNS)] = frame[list(READING_VALUE_COLUMNS)].astype(float)
+    return aggregate_rollups_frame(frame)
+
+def aggregate_rollups_frame(frame):
+    """Rollup rows of a DataFrame of readings (garden_id, datetime64 timestamp and float value columns)."""
+    rows = []
+    for resolution, bucket in ROLLUP_BUCKETS.items():
+        grouped = frame.assign(bucket_start=frame['timestamp'].dt.floor(bucket))\
+                       .groupby(['garden_id', 'bucket_start'])[list(READING_VALUE_COLUMNS)]
+        # One cythonized reduction per statistic; agg() with a list is much slower on small batches
+        aggregated = pd.concat({'min': grouped.min(), 'max': grouped.max(),
+                                'sum': grouped.sum(), 'count': grouped.count()}, axis=1)
+        aggregated.columns = [f'{column}_{stat}' for stat, column in aggregated.columns]
+        aggregated['readings_count'] = grouped.size()
+        aggregated = aggregated.reset_index()
+        aggregated['bucket_start'] = aggregated['bucket_start'].dt.to_pydatetime()
+        
+        # An object array hands back native values; all-null columns (a basic
+        # sensor's humidity, say) have NaN min/max, stored as NULL
+        values = aggregated.to_numpy(dtype=object)
+        values[aggregated.isna().to_numpy()] = None
+        fields = list(aggregated.columns)
+        rows.extend(dict(zip(fields, row), resolution=resolution) for row in values.tolist())
+    return rows
+
+def upsert_rollups(rows):
+    """Insert rollup rows, merging into any bucket that already exists."""
+    if not rows:
+        return
+    
+    is_postgres = db.session.get_bind().dialect.name == 'postgresql'
+    insert = postgresql.insert if is_postgres else sqlite.insert
+    # SQLite's multi-argument min()/max() are the scalar LEAST/GREATEST
+    lesser, greater = (db.func.least, db.func.greatest) if is_postgres else (db.func.min, db.func.max)
+    
+    table = ReadingRollup.__table__
+    statement = insert(table)
+    new = statement.excluded
+    merged = {'readings_count': table.c.readings_count + new.readings_count}
+    for column in READING_VALUE_COLUMNS:
+        for stat, combine in (('min', lesser), ('max', greater)):
+            current, incoming = table.c[f'{column}_{stat}'], new[f'{column}_{stat}']
+            # Either side may be NULL when a bucket has no values for the column yet
+            merged[f'{column}_{stat}'] = combine(db.func.coalesce(current, incoming),
+                                                 db.func.coalesce(incoming, current))
+        for stat in ('sum', 'count'):
+            merged[f'{column}_{stat}'] = table.c[f'{column}_{stat}'] + new[f'{column}_{stat}']
+    
+    db.session.execute(
+        statement.on_conflict_do_update(
+            index_elements=[table.c.garden_id, table.c.resolution, table.c.bucket_start],
+            set_=merged
+        ),
+        rows
+    )
+
+def rebuild_rollups(garden_ids, batch_size=10000):
+    """Recompute rollups from the readings currently stored, one garden at a time."""
+    for garden_id in garden_ids:
+        ReadingRollup.query.filter_by(garden_id=garden_id).delete(synchronize_session=False)
+        
+        readings = garden_readings_query(garden_id, newest_first=False)\
+            .with_entities(PlantReading.garden_id, PlantReading.timestamp,
+                           *[getattr(PlantReading, column) for column in READING_VALUE_COLUMNS])
+        result = db.session.execute(readings.statement.execution_options(yield_per=batch_size))
+        for batch in result.partitions():
+            update_rollups([row._asdict() for row in batch])
+        db.session.commit()
+
+def ensure_rollups():
+    """Build rollups for gardens whose readings predate the rollup tables; returns their ids.
+    
+    Can take minutes on a large database, so it runs as a one-off step
+    (flask rebuild-rollups --missing) rather than in every web worker.
+    """
+    has_rollups = db.session.query(ReadingRollup.garden_id)\
+                            .filter(ReadingRollup.garden_id == GardenStats.garden_id).exists()
+    missing = [garden_id for (garden_id,) in db.session.query(GardenStats.garden_id)
+               .filter(GardenStats.readings_count > 0, ~has_rollups).all()]
+    rebuild_rollups(missing)
+    return missing
+
+# Prediction models
+from backend.utils.analytics import MoistureModel, predict_next_watering
+
+# How far back a moisture model is fitted when a garden has none cached
+PREDICTION_WINDOW = timedelta(days=14)
+PREDICTION_FIT_LIMIT = 5000
+
+# garden_id -> MoistureModel, shared by request, import and simulation threads
+moisture_models = {}
+moisture_models_lock = threading.Lock()
+
+# Session.info key of the readings inserted in the open transaction; they
+# reach the cached models only once it commits
+PENDING_MODEL_READINGS = 'pending_moisture_model_readings'
+
+def update_moisture_models(mappings):
+    """Queue newly inserted readings for the cached models of their gardens.
+    
+    The readings are folded in when the session commits, so a rolled-back
+    insert (failed import, flush or constraint error) never reaches the cache.
+    """
+    db.session.info.setdefault(PENDING_MODEL_READINGS, []).extend(mappings)
+
+@event.listens_for(db.session, 'after_commit')
+def apply_pending_moisture_models(session):
+    mappings = session.info.pop(PENDING_MODEL_READINGS, None)
+    if mappings:
+        fold_into_moisture_models(mappings)
+
+@event.listens_for(db.session, 'after_transaction_end')
+def discard_pending_moisture_models(session, transaction):
+    # Whatever after_commit did not take was rolled back or closed unfinished
+    if transaction.parent is None:
+        session.info.pop(PENDING_MODEL_READINGS, None)
+
+def fold_into_moisture_models(mappings):
+    """Fold committed readings into the cached models of their gardens.
+    
+    Gardens without a cached model are fitted on first use instead. A model
+    is dropped (and refitted later) when readings arrive older than the ones
+    it has already seen, e.g. from a historical import.
+    """
+    by_garden = {}
+    for mapping in sorted(mappings, key=lambda mapping: mapping['timestamp']):
+        by_garden.setdefault(mapping['garden_id'], []).append(mapping)
+    
+    with moisture_models_lock:
+        for garden_id, readings in by_garden.items():
+            model = moisture_models.get(garden_id)
+            if model is None:
+                continue
+            if readings[0]['timestamp'] < model.last_timestamp:
+                del moisture_models[garden_id]
+                continue
+            model.update([reading['timestamp'] for reading in readings],
+                         [reading['moisture_level'] for reading in readings])
+
+def garden_moisture_model(garden):
+    """Cached moisture model of a garden, caught up with its latest reading.
+    
+    garden.stats (joined with the garden) says whether the cache is current,
+    so a cache hit costs no query. Models cached by other processes miss
+    readings inserted here, hence the catch-up from their last timestamp.
+    """
+    latest_reading = garden.stats.latest_reading if garden.stats else None
+    with moisture_models_lock:
+        model = moisture_models.get(garden.id)
+    if model and (latest_reading is None or latest_reading.timestamp <= model.last_timestamp):
+        return model
+    
+    columns = (PlantReading.timestamp, PlantReading.moisture_level)
+    if model:
+        newer = garden_readings_query(garden.id, newest_first=False)\
+                    .filter(PlantReading.timestamp > model.last_timestamp)\
+                    .with_entities(*columns).limit(PREDICTION_FIT_LIMIT).all()
+        if len(newer) == PREDICTION_FIT_LIMIT:
+            # Too far behind to catch up; refit from scratch
+            model = None
+        else:
+            with moisture_models_lock:
+                # Another thread may have folded some of them in meanwhile
+                newer = [row for row in newer if row.timestamp > model.last_timestamp]
+                if newer:
+                    timestamps, moisture = zip(*newer)
+                    model.update(timestamps, moisture)
+    
+    if not model:
+        since = datetime.utcnow() - PREDICTION_WINDOW
+        recent = garden_readings_query(garden.id)\
+                     .filter(PlantReading.timestamp >= since)\
+                     .with_entities(*columns).limit(PREDICTION_FIT_LIMIT).all()
+        model = MoistureModel()
+        if recent:
+            timestamps, moisture = zip(*reversed(recent))
+            model = MoistureModel.fit(timestamps, moisture)
+    
+    if model.last_timestamp:
+        with moisture_models_lock:
+            moisture_models[garden.id] = model
+    return model
+
+def gardens_moisture_models(gardens):
+    """Moisture models for many gardens, refitting every uncached or stale one at once.
+    
+    Readings of all gardens that need a fit come from one windowed query and
+    are fitted together by MoistureModel.fit_many. Returns {garden_id: model}.
+    """
+    models, stale = {}, []
+    with moisture_models_lock:
+        for garden in gardens:
+            model = moisture_models.get(garden.id)
+            latest_reading = garden.stats.latest_reading if garden.stats else None
+            if model and (latest_reading is None or latest_reading.timestamp <= model.last_timestamp):
+                models[garden.id] = model
+            else:
+                stale.append(garden.id)
+    
+    if stale:
+        since = datetime.utcnow() - PREDICTION_WINDOW
+        ranked = db.session.query(
+            PlantReading.garden_id.label('garden_id'),
+            PlantReading.timestamp.label('timestamp'),
+            PlantReading.moisture_level.label('moisture_level'),
+            db.func.row_number().over(
+                partition_by=PlantReading.garden_id,
+                order_by=(PlantReading.timestamp.desc(), PlantReading.id.desc())
+            ).label('position')
+        ).filter(PlantReading.garden_id.in_(stale), PlantReading.timestamp >= since).subquery()
+        
+        rows = db.session.query(ranked.c.garden_id, ranked.c.timestamp, ranked.c.moisture_level)\
+                         .filter(ranked.c.position <= PREDICTION_FIT_LIMIT)\
+                         .order_by(ranked.c.garden_id, ranked.c.position.desc()).all()
+        fitted = MoistureModel.fit_many(*zip(*rows)) if rows else {}
+        
+        with moisture_models_lock:
+            moisture_models.update(fitted)
+        for garden_id in stale:
+            models[garden_id] = fitted.get(garden_id) or MoistureModel()
+    
+    return models
+
 # User loader for Flask-Login
+from flask import g, has_request_context
+from sqlalchemy.orm import make_transient_to_detached
+from backend.utils.ttl_cache import TTLCache
+
+# Per process: user_id -> the user's column values, and user_id -> ids of the gardens they own
+user_cache = TTLCache(ttl=app.config['AUTH_CACHE_TTL'])
+garden_owner_cache = TTLCache(ttl=app.config['AUTH_CACHE_TTL'])
+
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    user_id = int(user_id)
+    values = user_cache.get(user_id)
+    if values is None:
+        user = db.session.get(User, user_id)
+        if user:
+            user_cache.set(user_id, {column.key: getattr(user, column.key) for column in User.__table__.columns})
+        return user
+    
+    # Rebuild the row without a query; merged into the session so that
+    # changes to current_user are still flushed as usual
+    user = User(**values)
+    make_transient_to_detached(user)
+    return db.session.merge(user, load=False)
+
+def owns_garden(garden_id):
+    """Whether current_user owns the garden, from the ownership cache when possible.
+    
+    Only "owned" answers are trusted from the cache: an id missing from it
+    reloads the set once, so a garden created by another process is found
+    immediately. A garden deleted elsewhere can stay owned for up to
+    AUTH_CACHE_TTL seconds; its read routes then just find no readings.
+    Routes that write readings query Garden directly instead.
+    """
+    owned = garden_owner_cache.get(current_user.id)
+    if owned is not None and garden_id in owned:
+        return True
+    owned = frozenset(garden_id for (garden_id,) in
+                      db.session.query(Garden.id).filter_by(user_id=current_user.id).all())
+    garden_owner_cache.set(current_user.id, owned)
+    return garden_id in owned
+
+@app.before_request
+def reset_query_count():
+    # g outlives the request when an app context was already pushed (CLI, tests)
+    g.query_count = 0
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def count_request_query(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context():
+        g.query_count = g.get('query_count', 0) + 1
+
+@app.after_request
+def add_query_count_header(response):
+    # A streamed body (e.g. export_data) runs its queries after the headers are sent
+    if app.config['QUERY_COUNT_HEADER'] and not response.is_streamed:
+        response.headers['X-Query-Count'] = str(g.get('query_count', 0))
+    return response
 
 # Authentication Routes
 from flask import Blueprint, request
@@ -215,6 +941,7 @@ def login():
             login_user(user, remember=True)
             user.last_login = datetime.utcnow()
             db.session.commit()
+            user_cache.invalidate(user.id)
             
             return jsonify({
                 'message': 'Logged in successfully',
@@ -257,7 +984,12 @@ def profile():
             if 'preferences' in data:
                 prefs = data['preferences']
                 if 'simulation_frequency' in prefs:
-                    current_user.simulation_frequency = prefs['simulation_frequency']
+                    frequency = prefs['simulation_frequency']
+                    if (not isinstance(frequency, int) or isinstance(frequency, bool)
+                            or frequency < MIN_SIMULATION_FREQUENCY):
+                        return jsonify({'error': 'simulation_frequency must be a whole number of seconds, '
+                                                 f'at least {MIN_SIMULATION_FREQUENCY}'}), 400
+                    current_user.simulation_frequency = frequency
                 if 'moisture_threshold' in prefs:
                     current_user.moisture_threshold = prefs['moisture_threshold']
                 if 'temperature_min' in prefs:
@@ -272,6 +1004,7 @@ def profile():
                 current_user.last_active_garden_id = data['last_active_garden_id']
             
             db.session.commit()
+            user_cache.invalidate(current_user.id)
             return jsonify({'message': 'Profile updated successfully', 'user': current_user.to_dict()}), 200
             
         except Exception as e:
@@ -280,6 +1013,9 @@ def profile():
             return jsonify({'error': 'Failed to update profile'}), 500
 
 # Garden Management Routes
+import numpy as np
+from backend.utils.downsampling import lttb_indices
+
 gardens_bp = Blueprint('gardens', __name__)
 
 @gardens_bp.route('/gardens', methods=['GET'])
@@ -313,11 +1049,13 @@ def add_garden():
             plant_type=data.get('plant_type', 'General'),
             watering_frequency=data.get('watering_frequency', 3),
             created_at=datetime.utcnow(),
-            last_accessed=datetime.utcnow()
+            last_accessed=datetime.utcnow(),
+            stats=GardenStats(readings_count=0)
         )
         
         db.session.add(new_garden)
         db.session.commit()
+        garden_owner_cache.invalidate(current_user.id)
         
         return jsonify({
             'message': 'Garden added successfully',
@@ -398,6 +1136,9 @@ def delete_garden(garden_id):
         
         db.session.delete(garden)
         db.session.commit()
+        garden_owner_cache.invalidate(current_user.id)
+        with moisture_models_lock:
+            moisture_models.pop(garden_id, None)
         
         return jsonify({'message': 'Garden deleted successfully'}), 200
         
@@ -410,23 +1151,30 @@ def delete_garden(garden_id):
 @login_required
 def get_garden_readings(garden_id):
     try:
-        garden = Garden.query.filter_by(id=garden_id, user_id=current_user.id).first()
-        
-        if not garden:
+        if not owns_garden(garden_id):
             return jsonify({'error': 'Garden not found'}), 404
         
+        # Cursor mode: ?limit=N for the first page, then ?before=<next_cursor>
+        if 'before' in request.args or 'limit' in request.args:
+            return get_garden_readings_by_cursor(garden_id)
+        
+        # Chart mode: ?points=N over a time range
+        if 'points' in request.args:
+            return get_garden_readings_downsampled(garden_id)
+        
         # Pagination
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 100, type=int)
         
-        readings = PlantReading.query.filter_by(garden_id=garden_id)\
-                                   .order_by(PlantReading.timestamp.desc())\
-                                   .paginate(page=page, per_page=per_page, error_out=False)
+        # The total comes from garden_stats, so skip paginate's COUNT(*)
+        readings = garden_readings_query(garden_id)\
+                                   .paginate(page=page, per_page=per_page, error_out=False, count=False)
+        total = garden_readings_total(garden_id)
         
         return jsonify({
             'readings': [reading.to_dict() for reading in readings.items],
-            'total': readings.total,
-            'pages': readings.pages,
+            'total': total,
+            'pages': math.ceil(total / readings.per_page) if readings.per_page else 0,
             'current_page': page
         }), 200
         
@@ -434,6 +1182,157 @@ def get_garden_readings(garden_id):
         app.logger.error(f"Get readings error: {str(e)}")
         return jsonify({'error': 'Failed to fetch readings'}), 500
 
+MAX_READINGS_PAGE_SIZE = 1000
+
+def garden_readings_total(garden_id):
+    return db.session.query(GardenStats.readings_count).filter_by(garden_id=garden_id).scalar() or 0
+
+def get_garden_readings_by_cursor(garden_id):
+    """Keyset page of readings, newest first; no COUNT(*) and no OFFSET."""
+    limit = min(max(request.args.get('limit', 100, type=int), 1), MAX_READINGS_PAGE_SIZE)
+    query = garden_readings_query(garden_id)
+    
+    before = request.args.get('before')
+    if before:
+        try:
+            query = readings_before(query, decode_reading_cursor(before))
+        except ValueError:
+            return jsonify({'error': 'Invalid cursor'}), 400
+    
+    # Fetch one extra row to learn whether another page exists
+    readings = query.limit(limit + 1).all()
+    has_more = len(readings) > limit
+    readings = readings[:limit]
+    
+    response = {
+        'readings': [reading.to_dict() for reading in readings],
+        'next_cursor': encode_reading_cursor(readings[-1]) if has_more else None
+    }
+    if request.args.get('include_total', '').lower() in ('1', 'true', 'yes'):
+        response['total'] = garden_readings_total(garden_id)
+    
+    return jsonify(response), 200
+
+# Default range per bucket when ?from= is omitted, and the most buckets one request may span
+ROLLUP_DEFAULT_RANGES = {'1h': timedelta(days=7), '1d': timedelta(days=365)}
+MAX_ROLLUP_BUCKETS = 5000
+
+@gardens_bp.route('/gardens/<int:garden_id>/readings/aggregate', methods=['GET'])
+@login_required
+def get_garden_reading_aggregates(garden_id):
+    """Hourly or daily min/max/mean per reading column, for chart ranges."""
+    try:
+        if not owns_garden(garden_id):
+            return jsonify({'error': 'Garden not found'}), 404
+        
+        bucket = request.args.get('bucket', '1h')
+        if bucket not in ROLLUP_BUCKETS:
+            return jsonify({'error': f"bucket must be one of: {', '.join(ROLLUP_BUCKETS)}"}), 400
+        
+        try:
+            end = parse_timestamp_arg('to') or datetime.utcnow()
+            start = parse_timestamp_arg('from') or end - ROLLUP_DEFAULT_RANGES[bucket]
+        except ValueError:
+            return jsonify({'error': 'from and to must be ISO 8601 timestamps'}), 400
+        
+        start = floor_timestamp(start, ROLLUP_BUCKETS[bucket])
+        if (end - start) / ROLLUP_BUCKETS[bucket] > MAX_ROLLUP_BUCKETS:
+            return jsonify({'error': f'Range spans more than {MAX_ROLLUP_BUCKETS} buckets'}), 400
+        
+        rollups = ReadingRollup.query.filter_by(garden_id=garden_id, resolution=bucket)\
+                                     .filter(ReadingRollup.bucket_start >= start,
+                                             ReadingRollup.bucket_start < end)\
+                                     .order_by(ReadingRollup.bucket_start).all()
+        
+        return jsonify({
+            'bucket': bucket,
+            'from': start.isoformat(),
+            'to': end.isoformat(),
+            'buckets': [rollup.to_dict() for rollup in rollups]
+        }), 200
+        
+    except Exception as e:
+        app.logger.error(f"Get reading aggregates error: {str(e)}")
+        return jsonify({'error': 'Failed to fetch reading aggregates'}), 500
+
+def parse_timestamp_arg(name):
+    """ISO 8601 query argument as a naive UTC datetime (None when absent)."""
+    value = request.args.get(name)
+    return parse_timestamp(value) if value else None
+
+def parse_timestamp(value):
+    """ISO 8601 string as a naive UTC datetime, the way readings are stored; raises ValueError."""
+    timestamp = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if timestamp.tzinfo:
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return timestamp
+
+MAX_DOWNSAMPLE_POINTS = 5000
+DOWNSAMPLE_DEFAULT_RANGE = timedelta(days=7)
+DOWNSAMPLE_FETCH_SIZE = 5000
+# Most readings one chart request may scan; longer ranges belong to /readings/aggregate
+MAX_DOWNSAMPLE_SOURCE_ROWS = 1000000
+
+def get_garden_readings_downsampled(garden_id):
+    """At most ?points= readings between ?from= and ?to=, picked with LTTB.
+    
+    Points are chosen on ?metric= (moisture_level by default) so its spikes
+    survive. Only the id, timestamp and metric are scanned, in yield_per
+    batches into NumPy arrays; every column is then fetched for just the
+    chosen readings.
+    """
+    points = min(max(request.args.get('points', 500, type=int), 3), MAX_DOWNSAMPLE_POINTS)
+    metric = request.args.get('metric', 'moisture_level')
+    if metric not in READING_VALUE_COLUMNS:
+        return jsonify({'error': f"metric must be one of: {', '.join(READING_VALUE_COLUMNS)}"}), 400
+    
+    try:
+        end = parse_timestamp_arg('to') or datetime.utcnow()
+        start = parse_timestamp_arg('from') or end - DOWNSAMPLE_DEFAULT_RANGE
+    except ValueError:
+        return jsonify({'error': 'from and to must be ISO 8601 timestamps'}), 400
+    
+    metric_column = getattr(PlantReading, metric)
+    query = garden_readings_query(garden_id, newest_first=False)\
+        .filter(PlantReading.timestamp >= start, PlantReading.timestamp < end, metric_column.isnot(None))\
+        .with_entities(PlantReading.id, PlantReading.timestamp, metric_column)\
+        .limit(MAX_DOWNSAMPLE_SOURCE_ROWS + 1)
+    result = db.session.execute(query.statement.execution_options(yield_per=DOWNSAMPLE_FETCH_SIZE))
+    
+    ids, timestamps, values = [], [], []
+    for batch in result.partitions():
+        batch_ids, batch_timestamps, batch_values = zip(*batch)
+        ids.append(np.array(batch_ids, dtype=np.int64))
+        timestamps.append(np.array(batch_timestamps, dtype='datetime64[us]'))
+        values.append(np.array(batch_values, dtype=float))
+    source_points = sum(len(batch_ids) for batch_ids in ids)
+    if source_points > MAX_DOWNSAMPLE_SOURCE_ROWS:
+        return jsonify({'error': f'Range holds more than {MAX_DOWNSAMPLE_SOURCE_ROWS} readings; '
+                                 f'narrow it or use /readings/aggregate'}), 400
+    if not source_points:
+        ids = timestamps = values = [np.empty(0)]
+    
+    timestamps = np.concatenate(timestamps).astype('datetime64[us]')
+    selected = lttb_indices(timestamps.astype(np.int64), np.concatenate(values), points)
+    selected_ids = np.concatenate(ids)[selected].tolist()
+    
+    readings = PlantReading.query.filter(PlantReading.id.in_(selected_ids),
+                                         PlantReading.timestamp >= start, PlantReading.timestamp < end)\
+                                 .order_by(PlantReading.timestamp, PlantReading.id).all() if selected_ids else []
+    columns = ('id', 'timestamp', *READING_VALUE_COLUMNS)
+    
+    return jsonify({
+        'readings': [
+            {column: (reading.timestamp.isoformat() if column == 'timestamp' else getattr(reading, column))
+             for column in columns}
+            for reading in readings
+        ],
+        'metric': metric,
+        'from': start.isoformat(),
+        'to': end.isoformat(),
+        'source_points': source_points
+    }), 200
+
 @gardens_bp.route('/gardens/<int:garden_id>/readings', methods=['POST'])
 @login_required
 def add_reading(garden_id):
@@ -448,26 +1347,23 @@ def add_reading(garden_id):
         if not data:
             return jsonify({'error': 'Reading data is required'}), 400
         
-        # Validate required fields
-        required_fields = ['moisture_level', 'temperature', 'light_intensity']
-        for field in required_fields:
-            if field not in data:
-                return jsonify({'error': f'{field} is required'}), 400
-        
-        new_reading = PlantReading(
-            garden_id=garden_id,
-            moisture_level=float(data['moisture_level']),
-            temperature=float(data['temperature']),
-            light_intensity=float(data['light_intensity']),
-            humidity=float(data.get('humidity', 0)) if data.get('humidity') else None,
-            ph_level=float(data.get('ph_level', 0)) if data.get('ph_level') else None,
-            notes=data.get('notes', '').strip(),
-            is_manual=data.get('is_manual', True),
-            timestamp=datetime.utcnow()
-        )
+        try:
+            reading = reading_from_json(data, garden_id, datetime.utcnow())
+        except (ValueError, TypeError) as e:
+            return jsonify({'error': str(e)}), 400
+        
+        if ingest_buffer:
+            return add_reading_buffered(reading)
         
+        ensure_reading_partitions_for([reading])
+        new_reading = PlantReading(**reading)
         db.session.add(new_reading)
         garden.last_accessed = datetime.utcnow()
+        db.session.flush()
+        record_new_readings({garden_id: 1})
+        update_rollups([reading])
+        update_moisture_models([{'garden_id': garden_id, 'timestamp': new_reading.timestamp,
+                                 'moisture_level': new_reading.moisture_level}])
         db.session.commit()
         
         return jsonify({
@@ -480,14 +1376,320 @@ def add_reading(garden_id):
         app.logger.error(f"Add reading error: {str(e)}")
         return jsonify({'error': 'Failed to add reading'}), 500
 
+REQUIRED_READING_FIELDS = ('moisture_level', 'temperature', 'light_intensity')
+
+def reading_from_json(data, garden_id, received_at, is_manual=True):
+    """Validate one JSON reading and turn it into a plant_readings mapping.
+    
+    The timestamp is optional (ISO 8601, stored as naive UTC) and defaults to
+    received_at. Raises ValueError or TypeError describing the first problem.
+    """
+    if not isinstance(data, dict):
+        raise ValueError('reading must be a JSON object')
+    for field in REQUIRED_READING_FIELDS:
+        if field not in data:
+            raise ValueError(f'{field} is required')
+    
+    reading = {
+        'garden_id': garden_id,
+        'timestamp': parse_timestamp(data['timestamp']) if data.get('timestamp') else received_at,
+        'moisture_level': float(data['moisture_level']),
+        'temperature': float(data['temperature']),
+        'light_intensity': float(data['light_intensity']),
+        'humidity': float(data['humidity']) if data.get('humidity') else None,
+        'ph_level': float(data['ph_level']) if data.get('ph_level') else None,
+        'notes': (data.get('notes') or '').strip(),
+        'is_manual': bool(data.get('is_manual', is_manual))
+    }
+    for field in READING_VALUE_COLUMNS:
+        if reading[field] is not None and not math.isfinite(reading[field]):
+            raise ValueError(f'{field} must be a finite number')
+    return reading
+
+# Largest JSON array one batch request may carry
+MAX_BATCH_READINGS = 5000
+# NDJSON lines validated and inserted per statement/commit
+INGEST_BATCH_SIZE = 1000
+MAX_REPORTED_INGEST_ERRORS = 20
+
+@gardens_bp.route('/gardens/<int:garden_id>/readings/batch', methods=['POST'])
+@login_required
+def add_readings_batch(garden_id):
+    """Insert a JSON array of readings for one garden with a single statement.
+    
+    Invalid readings are skipped and reported by index; the rest are stored.
+    """
+    try:
+        # Writes check ownership against the table, never the cache
+        if not Garden.query.filter_by(id=garden_id, user_id=current_user.id).count():
+            return jsonify({'error': 'Garden not found'}), 404
+        
+        data = request.get_json(silent=True)
+        if isinstance(data, dict):
+            data = data.get('readings')
+        if not isinstance(data, list) or not data:
+            return jsonify({'error': 'A JSON array of readings is required'}), 400
+        if len(data) > MAX_BATCH_READINGS:
+            return jsonify({'error': f'At most {MAX_BATCH_READINGS} readings per batch'}), 413
+        
+        received_at = datetime.utcnow()
+        mappings, errors = [], []
+        for index, item in enumerate(data):
+            try:
+                mappings.append(reading_from_json(item, garden_id, received_at, is_manual=False))
+            except (ValueError, TypeError) as e:
+                errors.append({'index': index, 'error': str(e)})
+        
+        if not mappings:
+            return jsonify({'error': 'No valid readings', 'errors': errors[:MAX_REPORTED_INGEST_ERRORS]}), 400
+        
+        insert_readings(mappings)
+        touch_gardens([garden_id], received_at)
+        db.session.commit()
+        
+        return jsonify({
+            'inserted': len(mappings),
+            'rejected': len(errors),
+            'errors': errors[:MAX_REPORTED_INGEST_ERRORS]
+        }), 201
+        
+    except Exception as e:
+        db.session.rollback()
+        app.logger.error(f"Batch readings error: {str(e)}")
+        return jsonify({'error': 'Failed to add readings'}), 500
+
+@gardens_bp.route('/readings/ingest', methods=['POST'])
+@login_required
+def ingest_readings():
+    """Stream newline-delimited JSON readings for any of the user's gardens.
+    
+    Every line is one reading object with a garden_id. The body is read line
+    by line and stored in committed batches of INGEST_BATCH_SIZE, so a
+    gateway can send an arbitrarily long stream. Lines that fail validation,
+    or name a garden the user does not own, are skipped and reported by line.
+    """
+    try:
+        owned = {}  # garden_id -> whether current_user owns it, queried once per request
+        received_at = datetime.utcnow()
+        result = {'inserted': 0, 'rejected': 0, 'batches': 0, 'errors': []}
+        touched, batch = set(), []
+        
+        def reject(line_number, reason):
+            result['rejected'] += 1
+            if len(result['errors']) < MAX_REPORTED_INGEST_ERRORS:
+                result['errors'].append({'line': line_number, 'error': reason})
+        
+        def flush():
+            insert_readings(batch)
+            db.session.commit()
+            result['inserted'] += len(batch)
+            result['batches'] += 1
+            batch.clear()
+        
+        # Buffered, so readline() does not pull the body a byte at a time
+        lines = io.BufferedReader(request.stream, buffer_size=64 * 1024)
+        for line_number, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            try:
+                item = json.loads(line)
+                garden_id = item.get('garden_id') if isinstance(item, dict) else None
+                if garden_id not in owned:
+                    owned[garden_id] = isinstance(garden_id, int) and bool(
+                        Garden.query.filter_by(id=garden_id, user_id=current_user.id).count())
+                if not owned[garden_id]:
+                    reject(line_number, 'unknown garden_id')
+                    continue
+                batch.append(reading_from_json(item, garden_id, received_at, is_manual=False))
+            except (ValueError, TypeError) as e:
+                reject(line_number, str(e))
+                continue
+            
+            touched.add(garden_id)
+            if len(batch) >= INGEST_BATCH_SIZE:
+                flush()
+        
+        if batch:
+            flush()
+        if touched:
+            touch_gardens(touched, received_at)
+            db.session.commit()
+        
+        return jsonify(result), 201 if result['inserted'] else 400
+        
+    except Exception as e:
+        db.session.rollback()
+        app.logger.error(f"Ingest readings error: {str(e)}")
+        return jsonify({'error': 'Failed to ingest readings'}), 500
+
+# Write-behind ingest (INGEST_MODE=buffered)
+import atexit
+import queue
+from backend.utils.ingest_buffer import IngestBuffer
+
+ingest_buffer = None
+
+def add_reading_buffered(reading):
+    """Queue a validated reading for the next group commit."""
+    try:
+        committed = ingest_buffer.submit(reading, timeout=app.config['INGEST_ENQUEUE_TIMEOUT_MS'] / 1000)
+    except queue.Full:
+        response = jsonify({'error': 'Ingest buffer is full, retry later'})
+        response.headers['Retry-After'] = '1'
+        return response, 503
+    
+    if app.config['INGEST_DURABILITY'] == 'enqueue':
+        return jsonify({'message': 'Reading queued'}), 202
+    
+    # The group may fail as a whole; the caller's except reports it as usual
+    committed.result()
+    return jsonify({
+        'message': 'Reading added successfully',
+        'reading': PlantReading(**reading).to_dict()
+    }), 201
+
+def flush_ingested_readings(mappings):
+    """Group commit run by the ingest buffer's flusher thread."""
+    with app.app_context():
+        try:
+            insert_readings(mappings)
+            touch_gardens({mapping['garden_id'] for mapping in mappings}, datetime.utcnow())
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            app.logger.error(f"Ingest flush error: {str(e)}")
+            raise
+
+def start_ingest_buffer():
+    global ingest_buffer
+    ingest_buffer = IngestBuffer(
+        flush_ingested_readings,
+        max_rows=app.config['INGEST_FLUSH_ROWS'],
+        max_delay=app.config['INGEST_FLUSH_INTERVAL_MS'] / 1000,
+        capacity=app.config['INGEST_BUFFER_CAPACITY']
+    )
+    # Readings acknowledged on enqueue must not be lost on a clean shutdown
+    atexit.register(ingest_buffer.drain)
+
+@gardens_bp.route('/ingest/status', methods=['GET'])
+@login_required
+def get_ingest_status():
+    """Queue depth and flush latency counters of the write-behind buffer."""
+    if not ingest_buffer:
+        return jsonify({'mode': 'sync'}), 200
+    return jsonify(dict(ingest_buffer.stats(), mode='buffered',
+                        durability=app.config['INGEST_DURABILITY'])), 200
+
+def touch_gardens(garden_ids, accessed_at):
+    """Set last_accessed once for every garden that received readings."""
+    Garden.query.filter(Garden.id.in_(list(garden_ids)))\
+                .update({Garden.last_accessed: accessed_at}, synchronize_session=False)
+
 # Data Management Routes
-import csv
-import io
-import pandas as pd
-from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor
+from flask import Response, stream_with_context
+from backend.utils.csv_handler import EXPORT_COLUMNS, export_readings, import_readings
+
+EXPORT_BATCH_SIZE = 1000
+IMPORT_BATCH_SIZE = 5000
 
 data_bp = Blueprint('data', __name__)
 
+import_executor = ThreadPoolExecutor(max_workers=app.config['IMPORT_WORKERS'], thread_name_prefix='csv-import')
+
+# Spool files are named job-<id>.csv; the process that queued the job
+# holds an exclusive lock on <spool>.lock until the job has finished
+SPOOL_FILE_NAME = re.compile(r'job-(\d+)\.csv$')
+
+def spool_lock(spool_path):
+    return FileLeaderLock(spool_path + '.lock')
+
+def fail_interrupted_import_jobs():
+    """Fail queued/running jobs whose process died, and delete their spool files.
+    
+    A spool file whose lock can be taken has no live owner any more: the
+    operating system dropped the lock when the process that queued the job
+    exited. Runs at startup, so a restarted worker cleans up after the one
+    it replaced. Returns the ids of the jobs marked failed.
+    """
+    spool_dir = app.config['IMPORT_SPOOL_DIR']
+    if not os.path.isdir(spool_dir):
+        return []
+    
+    failed = []
+    for name in os.listdir(spool_dir):
+        match = SPOOL_FILE_NAME.match(name)
+        if not match:
+            continue
+        spool_path = os.path.join(spool_dir, name)
+        lock = spool_lock(spool_path)
+        if not lock.acquire():
+            continue
+        try:
+            job_id = int(match.group(1))
+            interrupted = ImportJob.query.filter(ImportJob.id == job_id,
+                                                 ImportJob.status.in_(('queued', 'running')))\
+                                         .update({ImportJob.status: 'failed',
+                                                  ImportJob.message: 'Import interrupted by a server restart',
+                                                  ImportJob.finished_at: datetime.utcnow()},
+                                                 synchronize_session=False)
+            db.session.commit()
+            if interrupted:
+                failed.append(job_id)
+            remove_spool(spool_path)
+        finally:
+            lock.release()
+    
+    if failed:
+        app.logger.warning(f"Marked interrupted import jobs failed: {failed}")
+    return failed
+
+def remove_spool(spool_path):
+    for path in (spool_path, spool_path + '.lock'):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+def run_import_job(job_id, spool_path, lock):
+    """Import a spooled CSV upload, recording progress on its ImportJob row."""
+    with app.app_context():
+        job = db.session.get(ImportJob, job_id)
+        job.status = 'running'
+        job.started_at = datetime.utcnow()
+        db.session.commit()
+        
+        def record_progress(progress):
+            # One commit per batch covers both the readings and the counters
+            job.rows_inserted = progress['imported']
+            job.rows_rejected = progress['rejected']
+            job.batches = progress['batches']
+            db.session.commit()
+            app.logger.info(f"Import job {job_id}: batch {progress['batches']}, "
+                            f"{progress['imported']} imported, {progress['rejected']} rejected")
+        
+        try:
+            with open(spool_path, 'rb') as spool:
+                result = import_readings(spool, job.garden_id, insert_readings,
+                                         batch_size=IMPORT_BATCH_SIZE, on_progress=record_progress,
+                                         engine=app.config['CSV_IMPORT_ENGINE'])
+            job.rows_inserted = result['imported']
+            job.rows_rejected = result['rejected']
+            job.batches = result['batches']
+            job.errors = json.dumps(result['errors'])
+            job.status = 'completed'
+        except Exception as e:
+            db.session.rollback()
+            app.logger.error(f"Import job {job_id} error: {str(e)}")
+            job.status = 'failed'
+            job.message = str(e)
+        finally:
+            job.finished_at = datetime.utcnow()
+            db.session.commit()
+            db.session.remove()
+            remove_spool(spool_path)
+            lock.release()
+
 @data_bp.route('/gardens/<int:garden_id>/import_data', methods=['POST'])
 @login_required
 def import_garden_data(garden_id):
@@ -507,94 +1709,86 @@ def import_garden_data(garden_id):
         if not file.filename.endswith('.csv'):
             return jsonify({'error': 'File must be a CSV'}), 400
         
-        # Read CSV data
-        stream = io.StringIO(file.stream.read().decode("UTF8"), newline=None)
-        csv_input = csv.DictReader(stream)
-        
-        imported_count = 0
-        for row in csv_input:
-            try:
-                # Parse timestamp
-                timestamp_str = row.get('timestamp', row.get('Timestamp', ''))
-                if timestamp_str:
-                    timestamp = datetime.fromisoformat(timestamp_str.replace('Z', '+00:00'))
-                else:
-                    timestamp = datetime.utcnow()
-                
-                reading = PlantReading(
-                    garden_id=garden_id,
-                    timestamp=timestamp,
-                    moisture_level=float(row.get('moisture_level', row.get('Moisture', 0))),
-                    temperature=float(row.get('temperature', row.get('Temperature', 0))),
-                    light_intensity=float(row.get('light_intensity', row.get('Light', 0))),
-                    humidity=float(row.get('humidity', 0)) if row.get('humidity') else None,
-                    ph_level=float(row.get('ph_level', 0)) if row.get('ph_level') else None,
-                    notes=row.get('notes', ''),
-                    is_manual=True
-                )
-                
-                db.session.add(reading)
-                imported_count += 1
-                
-            except (ValueError, KeyError) as e:
-                app.logger.warning(f"Skipping invalid row: {row}, error: {str(e)}")
-                continue
-        
+        # Spool the upload to disk and let a worker thread parse and insert it,
+        # so this request worker is free again as soon as the file is saved
+        job = ImportJob(user_id=current_user.id, garden_id=garden_id, filename=file.filename)
+        db.session.add(job)
         db.session.commit()
         
+        os.makedirs(app.config['IMPORT_SPOOL_DIR'], exist_ok=True)
+        spool_path = os.path.join(app.config['IMPORT_SPOOL_DIR'], f'job-{job.id}.csv')
+        # Locked before the file exists, so a startup sweep in another
+        # process never mistakes a job still being queued for an orphan
+        lock = spool_lock(spool_path)
+        lock.acquire()
+        try:
+            with open(spool_path, 'wb') as spool:
+                file.save(spool)
+            import_executor.submit(run_import_job, job.id, spool_path, lock)
+        except Exception:
+            job.status = 'failed'
+            job.message = 'Could not queue the import'
+            db.session.commit()
+            remove_spool(spool_path)
+            lock.release()
+            raise
+        
         return jsonify({
-            'message': f'Successfully imported {imported_count} readings',
-            'imported_count': imported_count
-        }), 200
+            'message': 'Import queued',
+            'job': job.to_dict()
+        }), 202, {'Location': f'/api/jobs/{job.id}'}
         
     except Exception as e:
         db.session.rollback()
         app.logger.error(f"Import data error: {str(e)}")
         return jsonify({'error': 'Failed to import data'}), 500
 
+@data_bp.route('/jobs/<int:job_id>', methods=['GET'])
+@login_required
+def get_job(job_id):
+    job = ImportJob.query.filter_by(id=job_id, user_id=current_user.id).first()
+    
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    return jsonify({'job': job.to_dict()}), 200
+
 @data_bp.route('/gardens/<int:garden_id>/export_data', methods=['GET'])
 @login_required
 def export_garden_data(garden_id):
     try:
-        garden = Garden.query.filter_by(id=garden_id, user_id=current_user.id).first()
-        
-        if not garden:
+        if not owns_garden(garden_id):
             return jsonify({'error': 'Garden not found'}), 404
         
-        readings = PlantReading.query.filter_by(garden_id=garden_id)\
-                                   .order_by(PlantReading.timestamp.asc()).all()
-        
-        output = io.StringIO()
-        writer = csv.writer(output)
-        
-        # Write header
-        writer.writerow([
-            'timestamp', 'moisture_level', 'temperature', 'light_intensity',
-            'humidity', 'ph_level', 'notes', 'is_manual'
-        ])
-        
-        # Write data
-        for reading in readings:
-            writer.writerow([
-                reading.timestamp.isoformat(),
-                reading.moisture_level,
-                reading.temperature,
-                reading.light_intensity,
-                reading.humidity,
-                reading.ph_level,
-                reading.notes,
-                reading.is_manual
-            ])
-        
-        output.seek(0)
+        try:
+            since, until = parse_timestamp_arg('from'), parse_timestamp_arg('to')
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        query = garden_readings_query(garden_id, newest_first=False)
+        # Optional bounds; on a partitioned table they also limit the scan to the months involved
+        if since:
+            query = query.filter(PlantReading.timestamp >= since)
+        if until:
+            query = query.filter(PlantReading.timestamp <= until)
+        
+        # Plain column tuples fetched in batches: no ORM objects, and only one
+        # batch of rows plus one CSV chunk is held in memory at a time
+        rows = query.with_entities(*[getattr(PlantReading, column) for column in EXPORT_COLUMNS])\
+                    .yield_per(EXPORT_BATCH_SIZE)
+        
+        headers = {
+            'Content-Disposition': f'attachment; filename=garden_{garden_id}_data.csv',
+            'Vary': 'Accept-Encoding'
+        }
+        compress = request.accept_encodings['gzip'] > 0
+        if compress:
+            headers['Content-Encoding'] = 'gzip'
         
-        from flask import Response
         return Response(
-            output.getvalue(),
+            stream_with_context(export_readings(rows, compress=compress)),
             mimetype='text/csv',
-            headers={
-                'Content-Disposition': f'attachment; filename=garden_{garden_id}_data.csv'
-            }
+            headers=headers
         )
         
     except Exception as e:
@@ -605,225 +1799,920 @@ def export_garden_data(garden_id):
 @login_required
 def get_prediction(garden_id):
     try:
-        garden = Garden.query.filter_by(id=garden_id, user_id=current_user.id).first()
+        garden = db.session.get(Garden, garden_id) if owns_garden(garden_id) else None
         
         if not garden:
             return jsonify({'error': 'Garden not found'}), 404
         
-        # Get recent readings for prediction
-        recent_readings = PlantReading.query.filter_by(garden_id=garden_id)\
-                                          .filter(PlantReading.timestamp >= datetime.utcnow() - timedelta(days=7))\
-                                          .order_by(PlantReading.timestamp.desc()).limit(20).all()
+        model = garden_moisture_model(garden)
+        return jsonify(predict_next_watering(model, current_user.moisture_threshold)), 200
         
-        if len(recent_readings) < 3:
-            return jsonify({
-                'next_watering_estimate': 'Not enough data',
-                'recommendation': 'Add more readings to get predictions'
-            }), 200
-        
-        # Simple prediction based on moisture decline rate
-        moisture_values = [r.moisture_level for r in reversed(recent_readings)]
+    except Exception as e:
+        app.logger.error(f"Prediction error: {str(e)}")
+        return jsonify({'error': 'Failed to generate prediction'}), 500
+
+@data_bp.route('/predictions', methods=['GET'])
+@login_required
+def get_predictions():
+    """Predictions for ?garden_ids=1,2,3 (default: all of the user's gardens)."""
+    try:
+        gardens = Garden.query.filter_by(user_id=current_user.id)
         
-        # Calculate average moisture decline per day
-        if len(moisture_values) >= 2:
-            daily_decline = (moisture_values[0] - moisture_values[-1]) / len(moisture_values)
-            current_moisture = moisture_values[-1]
-            
-            # Predict when moisture will reach threshold
-            days_until_watering = max(0, (current_moisture - current_user.moisture_threshold) / max(daily_decline, 1))
-            
-            next_watering = datetime.utcnow() + timedelta(days=days_until_watering)
-            
-            recommendation = "Water soon" if days_until_watering < 1 else "Plant is healthy"
-            
-            return jsonify({
-                'next_watering_estimate': next_watering.isoformat(),
-                'days_until_watering': round(days_until_watering, 1),
-                'current_moisture': current_moisture,
-                'recommendation': recommendation
-            }), 200
+        if request.args.get('garden_ids'):
+            try:
+                garden_ids = [int(garden_id) for garden_id in request.args['garden_ids'].split(',')]
+            except ValueError:
+                return jsonify({'error': 'garden_ids must be a comma-separated list of ids'}), 400
+            gardens = gardens.filter(Garden.id.in_(garden_ids))
         
+        models = gardens_moisture_models(gardens.all())
         return jsonify({
-            'next_watering_estimate': 'Unable to calculate',
-            'recommendation': 'Monitor moisture levels'
+            'predictions': {
+                garden_id: predict_next_watering(model, current_user.moisture_threshold)
+                for garden_id, model in models.items()
+            }
         }), 200
         
     except Exception as e:
-        app.logger.error(f"Prediction error: {str(e)}")
-        return jsonify({'error': 'Failed to generate prediction'}), 500
+        app.logger.error(f"Batch prediction error: {str(e)}")
+        return jsonify({'error': 'Failed to generate predictions'}), 500
 
 # Weather API Routes
+import time
 import requests
+from backend.utils.weather_api import create_weather_client, prefetch_weather
 
 weather_bp = Blueprint('weather', __name__)
 
+# Shared by all request threads: one connection pool and one cache per process
+weather_client = create_weather_client(
+    provider=app.config['WEATHER_PROVIDER'],
+    api_key=app.config['WEATHER_API_KEY'],
+    base_url=app.config['WEATHER_API_URL'],
+    ttl=app.config['WEATHER_CACHE_TTL'],
+    max_entries=app.config['WEATHER_CACHE_SIZE']
+)
+
 @weather_bp.route('/weather', methods=['GET'])
 @login_required
 def get_weather():
     try:
+        start_weather_prefetch()
         location = request.args.get('location')
+        lat = request.args.get('lat', type=float)
+        lon = request.args.get('lon', type=float)
         
-        
-        if not location:
+        if not location and (lat is None or lon is None):
             return jsonify({'error': 'Location parameter is required'}), 400
         
-        # For demo purposes, we'll simulate weather data
-        # In production, you would use a real weather API like OpenWeatherMap
-        api_key = os.environ.get('WEATHER_API_KEY')
-        
-        if api_key:
-            # Real API call (commented out for demo)
-            # url = f"http://api.openweathermap.org/data/2.5/weather?q={location}&appid={api_key}&units=metric"
-            # response = requests.get(url)
-            # if response.status_code == 200:
-            #     return jsonify(response.json()), 200
-            pass
-        
-        # Simulated weather data
-        import random
-        weather_conditions = ['sunny', 'cloudy', 'rainy', 'partly cloudy', 'overcast']
-        
-        simulated_data = {
-            'name': location,
-            'main': {
-                'temp': round(15 + random.random() * 20, 1),
-                'humidity': round(40 + random.random() * 40),
-                'pressure': round(1000 + random.random() * 50)
-            },
-            'weather': [{
-                'main': random.choice(['Clear', 'Clouds', 'Rain']),
-                'description': random.choice(weather_conditions)
-            }],
-            'wind': {
-                'speed': round(random.random() * 10, 1)
-            },
-            'visibility': round(8000 + random.random() * 2000),
-            'simulated': True
-        }
-        
-        return jsonify(simulated_data), 200
+        return jsonify(weather_client.current(location, lat, lon)), 200
         
+    except requests.RequestException as e:
+        app.logger.error(f"Weather provider error: {str(e)}")
+        return jsonify({'error': 'Weather provider unavailable'}), 502
     except Exception as e:
         app.logger.error(f"Weather API error: {str(e)}")
         return jsonify({'error': 'Failed to fetch weather data'}), 500
 
+def prefetch_garden_weather():
+    """Warm the weather cache for every garden with coordinates, one fetch per cell."""
+    started = time.monotonic()
+    coordinates = db.session.query(Garden.location_lat, Garden.location_lon)\
+                            .filter(Garden.location_lat.isnot(None), Garden.location_lon.isnot(None))\
+                            .distinct().all()
+    # Release the connection; the fetches below can take a while
+    db.session.remove()
+    
+    result = prefetch_weather(weather_client, coordinates, app.config['WEATHER_PREFETCH_WORKERS'])
+    result['duration_ms'] = round((time.monotonic() - started) * 1000, 1)
+    app.logger.info(f"Weather prefetch: {result['fetched']} of {result['cells']} cells refreshed "
+                    f"in {result['duration_ms']} ms")
+    return result
+
+# The prefetch warms this process's weather cache, so every web process
+# runs its own, started by its first weather request (after any fork)
+weather_prefetch_started = False
+weather_prefetch_lock = threading.Lock()
+
+def start_weather_prefetch():
+    global weather_prefetch_started
+    if weather_prefetch_started:
+        return
+    with weather_prefetch_lock:
+        if not weather_prefetch_started:
+            threading.Thread(target=run_weather_prefetch_schedule, name='weather-prefetch', daemon=True).start()
+            weather_prefetch_started = True
+
+def run_weather_prefetch_schedule():
+    """Background task refreshing garden weather every WEATHER_PREFETCH_INTERVAL seconds"""
+    with app.app_context():
+        while True:
+            try:
+                prefetch_garden_weather()
+            except Exception as e:
+                app.logger.error(f"Weather prefetch error: {str(e)}")
+            time.sleep(app.config['WEATHER_PREFETCH_INTERVAL'])
+
 # Simulation and Utility Functions
-import random
-import threading
-import time
+from collections import deque
+from backend.utils.scheduler import DueScheduler
+from backend.utils.simulation import generate_readings
+
+SIMULATED_SENSOR_TYPES = ('simulated_basic', 'simulated_full')
+# Columns simulated_basic sensors do not report
+FULL_SENSOR_ONLY_COLUMNS = ('humidity', 'ph_level')
+# User.simulation_frequency as the scheduler applies it
+DEFAULT_SIMULATION_FREQUENCY = 60  # seconds
+MIN_SIMULATION_FREQUENCY = 5  # seconds
+# Most gardens one simulation_tick generates readings for
+SIMULATION_BATCH_SIZE = 1000
+# How often new or deleted gardens and changed frequencies are picked up
+SIMULATION_REFRESH_INTERVAL = 10  # seconds
+SIMULATION_STATS_LOG_INTERVAL = 60  # seconds
+# How often the runner publishes its stats for the web processes, and when they count as stale
+SIMULATION_STATUS_INTERVAL = 10  # seconds
+SIMULATION_STATUS_STALE_AFTER = 60  # seconds
+# Most recent per-garden lags the reported percentiles cover
+SIMULATION_LAG_WINDOW = 10000
+
+# Owned by the simulation thread: garden_id -> next due time (time.monotonic())
+simulation_schedule = DueScheduler()
+# garden_id -> frequency (seconds) each garden is scheduled at
+simulation_frequencies = {}
+# Seconds between a garden falling due and its reading being committed
+simulation_lags = deque(maxlen=SIMULATION_LAG_WINDOW)
+simulation_counters = {'running': False, 'batches': 0, 'generated': 0, 'skipped': 0, 'max_lag_ms': 0.0}
+simulation_stats_lock = threading.Lock()
+
+class BackgroundStatus(db.Model):
+    """Latest status a background task published, for processes that do not run it."""
+    __tablename__ = 'background_status'
+    
+    name = db.Column(db.String(50), primary_key=True)
+    status = db.Column(db.Text, nullable=False)  # JSON
+    updated_at = db.Column(db.DateTime, nullable=False)
+
+def publish_simulation_status():
+    db.session.merge(BackgroundStatus(name='simulation', status=json.dumps(simulation_stats()),
+                                      updated_at=datetime.utcnow()))
+    db.session.commit()
 
 def generate_simulated_data():
-    """Background task to generate simulated sensor data"""
+    """Background task generating readings for each simulated garden at its owner's simulation_frequency"""
     with app.app_context():
+        simulation_counters['running'] = True
+        next_refresh = next_stats_log = next_status = time.monotonic()
         while True:
+            now = time.monotonic()
             try:
-                # Get all gardens with simulation enabled
-                gardens = Garden.query.filter(Garden.sensor_type.like('simulated%')).all()
-                
-                for garden in gardens:
-                    if garden.sensor_type == 'none':
-                        continue
-                    
-                    # Get latest reading
-                    latest = PlantReading.query.filter_by(garden_id=garden.id)\
-                                             .order_by(PlantReading.timestamp.desc()).first()
-                    
-                    # Generate new reading based on sensor type and previous data
-                    if garden.sensor_type == 'simulated_basic':
-                        moisture = generate_moisture_reading(latest)
-                        temp = generate_temperature_reading(latest)
-                        light = generate_light_reading(latest)
-                        
-                        new_reading = PlantReading(
-                            garden_id=garden.id,
-                            moisture_level=moisture,
-                            temperature=temp,
-                            light_intensity=light,
-                            is_manual=False,
-                            timestamp=datetime.utcnow()
-                        )
-                        
-                    elif garden.sensor_type == 'simulated_full':
-                        moisture = generate_moisture_reading(latest)
-                        temp = generate_temperature_reading(latest)
-                        light = generate_light_reading(latest)
-                        humidity = generate_humidity_reading(latest)
-                        ph = generate_ph_reading(latest)
-                        
-                        new_reading = PlantReading(
-                            garden_id=garden.id,
-                            moisture_level=moisture,
-                            temperature=temp,
-                            light_intensity=light,
-                            humidity=humidity,
-                            ph_level=ph,
-                            is_manual=False,
-                            timestamp=datetime.utcnow()
-                        )
-                    else:
-                        continue
-                    
-                    db.session.add(new_reading)
-                    
-                    # Clean up old readings (keep last 1000 per garden)
-                    old_readings = PlantReading.query.filter_by(garden_id=garden.id)\
-                                                   .order_by(PlantReading.timestamp.desc())\
-                                                   .offset(1000).all()
-                    for old_reading in old_readings:
-                        db.session.delete(old_reading)
-                
-                db.session.commit()
-                
+                if now >= next_refresh:
+                    # Advanced first: a failing refresh must not be retried in a busy loop
+                    next_refresh = now + SIMULATION_REFRESH_INTERVAL
+                    refresh_simulation_schedule(now)
+                run_due_simulations(now)
             except Exception as e:
                 app.logger.error(f"Simulation error: {str(e)}")
                 db.session.rollback()
             
-            # Wait before next simulation cycle
-            time.sleep(60)  # Generate data every minute
-
-def generate_moisture_reading(latest):
-    if latest:
-        # Gradual decline with some variation
-        base = latest.moisture_level - random.uniform(0.5, 2.0)
-        variation = random.uniform(-5, 5)
-        return max(0, min(100, base + variation))
-    return random.uniform(40, 80)
-
-def generate_temperature_reading(latest):
-    if latest:
-        # Small variations around previous reading
-        base = latest.temperature
-        variation = random.uniform(-2, 2)
-        return max(5, min(40, base + variation))
-    return random.uniform(18, 25)
-
-def generate_light_reading(latest):
-    # Simulate day/night cycle
-    hour = datetime.now().hour
-    if 6 <= hour <= 18:  # Daytime
-        base_light = random.uniform(500, 1500)
-    else:  # Nighttime
-        base_light = random.uniform(0, 100)
-    
-    if latest:
-        # Smooth transition
-        diff = base_light - latest.light_intensity
-        return latest.light_intensity + (diff * 0.3) + random.uniform(-50, 50)
-    return base_light
-
-def generate_humidity_reading(latest):
-    if latest and latest.humidity:
-        base = latest.humidity
-        variation = random.uniform(-3, 3)
-        return max(20, min(100, base + variation))
-    return random.uniform(45, 75)
-
-def generate_ph_reading(latest):
-    if latest and latest.ph_level:
-        base = latest.ph_level
-        variation = random.uniform(-0.1, 0.1)
-        return max(4.0, min(8.0, base + variation))
-    return random.uniform(6.0, 7.5)
+            if now >= next_stats_log:
+                app.logger.info(f"Simulation schedule: {simulation_stats()}")
+                next_stats_log = now + SIMULATION_STATS_LOG_INTERVAL
+            if now >= next_status:
+                next_status = now + SIMULATION_STATUS_INTERVAL
+                try:
+                    publish_simulation_status()
+                except Exception as e:
+                    app.logger.error(f"Simulation status error: {str(e)}")
+                    db.session.rollback()
+            
+            # Sleep until the next garden is due, waking for refreshes in between
+            next_due = simulation_schedule.next_due()
+            wake = min(next_refresh, next_status) if next_due is None else min(next_due, next_refresh, next_status)
+            time.sleep(max(0, wake - time.monotonic()))
+
+def scheduled_frequency(frequency):
+    """A stored simulation_frequency as the scheduler applies it.
+    
+    Rows saved before the profile route validated it may hold anything;
+    values that are not numbers get the default rather than stopping the
+    simulator.
+    """
+    try:
+        frequency = int(frequency or DEFAULT_SIMULATION_FREQUENCY)
+    except (TypeError, ValueError, OverflowError):
+        frequency = DEFAULT_SIMULATION_FREQUENCY
+    return max(MIN_SIMULATION_FREQUENCY, frequency)
+
+def refresh_simulation_schedule(now):
+    """Bring the schedule in line with the simulated gardens and their owners' frequencies.
+    
+    The load-test user's gardens are left to simulate-load.
+    """
+    gardens = db.session.query(Garden.id, User.simulation_frequency)\
+                        .join(User, User.id == Garden.user_id)\
+                        .filter(Garden.sensor_type.in_(SIMULATED_SENSOR_TYPES),
+                                User.username != LOAD_TEST_USERNAME).all()
+    db.session.rollback()  # do not hold the read transaction while sleeping
+    frequencies = {garden_id: scheduled_frequency(frequency) for garden_id, frequency in gardens}
+    
+    for garden_id in set(simulation_frequencies) - set(frequencies):
+        simulation_schedule.remove(garden_id)
+        del simulation_frequencies[garden_id]
+    
+    for garden_id, frequency in frequencies.items():
+        previous = simulation_frequencies.get(garden_id)
+        if previous == frequency:
+            continue
+        if previous is None:
+            # Spread new gardens over their first period so they do not all fall due together
+            due = now + (garden_id * 0.618034) % 1 * frequency
+        else:
+            # Keep the time of the garden's last reading; only the period changes
+            due = simulation_schedule.due_at(garden_id) - previous + frequency
+        simulation_schedule.schedule(garden_id, due)
+        simulation_frequencies[garden_id] = frequency
+
+def run_due_simulations(now):
+    """Generate readings for every garden due by now, SIMULATION_BATCH_SIZE gardens per tick."""
+    while True:
+        due = simulation_schedule.pop_due(now, SIMULATION_BATCH_SIZE)
+        if not due:
+            return
+        
+        # Reschedule first, so a failed tick skips one period instead of dropping the garden
+        skipped = 0
+        for garden_id, due_at in due:
+            frequency = simulation_frequencies[garden_id]
+            # A garden more than a whole period behind skips the missed readings rather than bursting them
+            missed = int((now - due_at) // frequency)
+            skipped += missed
+            simulation_schedule.schedule(garden_id, due_at + (missed + 1) * frequency)
+        
+        simulation_tick(garden_ids=[garden_id for garden_id, _ in due])
+        generated_at = time.monotonic()
+        record_simulation_lags([generated_at - due_at for _, due_at in due], skipped)
+
+def record_simulation_lags(lags, skipped):
+    with simulation_stats_lock:
+        simulation_lags.extend(lags)
+        simulation_counters['batches'] += 1
+        simulation_counters['generated'] += len(lags)
+        simulation_counters['skipped'] += skipped
+        simulation_counters['max_lag_ms'] = round(max(simulation_counters['max_lag_ms'], max(lags) * 1000), 1)
+
+def simulation_stats():
+    """Scheduler counters plus due-to-generated lag percentiles over the last SIMULATION_LAG_WINDOW readings."""
+    with simulation_stats_lock:
+        stats = dict(simulation_counters)
+        lags = np.array(simulation_lags)
+    stats['scheduled_gardens'] = len(simulation_frequencies)
+    if lags.size:
+        p50, p95, p99 = (np.percentile(lags, [50, 95, 99]) * 1000).round(1).tolist()
+        stats.update(lag_p50_ms=p50, lag_p95_ms=p95, lag_p99_ms=p99)
+    return stats
+
+@gardens_bp.route('/simulation/status', methods=['GET'])
+@login_required
+def get_simulation_status():
+    """Simulation scheduler counters, from whichever process runs the simulator.
+    
+    Web workers serve what the run-background process last published;
+    running is false once that is older than SIMULATION_STATUS_STALE_AFTER.
+    """
+    if simulation_counters['running']:
+        return jsonify(dict(simulation_stats(), updated_at=datetime.utcnow().isoformat())), 200
+    
+    published = db.session.get(BackgroundStatus, 'simulation')
+    if not published:
+        return jsonify(simulation_stats()), 200
+    stats = json.loads(published.status)
+    stats['updated_at'] = published.updated_at.isoformat()
+    if datetime.utcnow() - published.updated_at > timedelta(seconds=SIMULATION_STATUS_STALE_AFTER):
+        stats['running'] = False
+    return jsonify(stats), 200
+
+def simulated_gardens_query(garden_ids=None, shard=None, user_id=None):
+    """Simulated gardens with the values of their latest reading, looked up through garden_stats."""
+    query = db.session.query(
+        Garden.id, Garden.sensor_type,
+        *[getattr(PlantReading, column) for column in READING_VALUE_COLUMNS]
+    ).outerjoin(GardenStats, GardenStats.garden_id == Garden.id)\
+     .outerjoin(PlantReading, PlantReading.id == GardenStats.latest_reading_id)\
+     .filter(Garden.sensor_type.in_(SIMULATED_SENSOR_TYPES))
+    if garden_ids is not None:
+        query = query.filter(Garden.id.in_(garden_ids))
+    if user_id is not None:
+        query = query.filter(Garden.user_id == user_id)
+    if shard is not None:
+        index, count = shard
+        query = query.filter(Garden.id % count == index)
+    return query
+
+def simulation_tick(now=None, rng=None, garden_ids=None, shard=None, user_id=None):
+    """Generate one reading for every simulated garden, set-based.
+    
+    garden_ids limits the tick to those gardens, user_id to that user's
+    gardens and shard=(index, count) to the gardens whose id % count == index.
+    
+    One query loads every garden's latest reading (through garden_stats),
+    the new values are drawn in one vectorised pass and inserted with a
+    single executemany. Old readings are left to the retention job.
+    Returns counters for the tick, including its duration.
+    """
+    started = time.monotonic()
+    now = now or datetime.utcnow()
+    # Before the read below, so this transaction sees the partition when it inserts
+    ensure_reading_partitions_for([{'timestamp': now}])
+    
+    rows = simulated_gardens_query(garden_ids, shard, user_id).all()
+    
+    if not rows:
+        return {'gardens': 0, 'inserted': 0, 'duration_ms': 0.0}
+    
+    # None (no previous reading) becomes NaN in the float arrays
+    previous = {
+        column: np.array([getattr(row, column) for row in rows], dtype=float)
+        for column in READING_VALUE_COLUMNS
+    }
+    # Day/night follows the server's local clock, as the scalar model did
+    hours = np.full(len(rows), datetime.now().hour)
+    values = generate_readings(previous, hours, rng)
+    values = {column: array.tolist() for column, array in values.items()}
+    
+    mappings = []
+    for position, row in enumerate(rows):
+        mapping = {
+            'garden_id': row.id,
+            'timestamp': now,
+            'is_manual': False
+        }
+        for column in READING_VALUE_COLUMNS:
+            mapping[column] = values[column][position]
+        if row.sensor_type != 'simulated_full':
+            for column in FULL_SENSOR_ONLY_COLUMNS:
+                mapping[column] = None
+        mappings.append(mapping)
+    
+    insert_readings(mappings)
+    db.session.commit()
+    
+    tick = {
+        'gardens': len(rows),
+        'inserted': len(mappings),
+        'duration_ms': round((time.monotonic() - started) * 1000, 1)
+    }
+    app.logger.debug(f"Simulation tick: {tick['inserted']} readings for {tick['gardens']} gardens "
+                    f"in {tick['duration_ms']} ms")
+    return tick
+
+# Retention
+import click
+from flask.cli import AppGroup
+
+RetentionRule = namedtuple('RetentionRule', 'keep_rows keep_days downsample')
+
+DOWNSAMPLE_BUCKETS = {'hourly': timedelta(hours=1), 'daily': timedelta(days=1)}
+DOWNSAMPLED_NOTES = {name: f'downsampled {name}' for name in DOWNSAMPLE_BUCKETS}
+# Gardens per DELETE statement when expiring across gardens
+RETENTION_GARDENS_PER_STATEMENT = 200
+
+def retention_rules():
+    """Group gardens by the retention rule that applies to them.
+    
+    A garden's own policy wins over its sensor type's policy, which wins over
+    app.config['RETENTION_DEFAULTS']. Returns {RetentionRule: {garden_id: readings_count}}.
+    """
+    policies = RetentionPolicy.query.all()
+    by_garden = {policy.garden_id: policy.to_rule() for policy in policies if policy.garden_id}
+    by_sensor_type = {
+        sensor_type: RetentionRule(rule.get('keep_rows'), rule.get('keep_days'), rule.get('downsample'))
+        for sensor_type, rule in app.config['RETENTION_DEFAULTS'].items()
+    }
+    by_sensor_type.update({policy.sensor_type: policy.to_rule() for policy in policies if policy.sensor_type})
+    
+    rules = {}
+    gardens = db.session.query(Garden.id, Garden.sensor_type, GardenStats.readings_count)\
+                        .outerjoin(GardenStats, GardenStats.garden_id == Garden.id).all()
+    for garden_id, sensor_type, readings_count in gardens:
+        rule = by_garden.get(garden_id) or by_sensor_type.get(sensor_type)
+        if rule and (rule.keep_rows is not None or rule.keep_days is not None):
+            rules.setdefault(rule, {})[garden_id] = readings_count or 0
+    return rules
+
+def run_retention(now=None, chunk_size=None):
+    """Apply every retention rule once; returns how many readings were removed and added."""
+    started = time.monotonic()
+    now = now or datetime.utcnow()
+    chunk_size = chunk_size or app.config['RETENTION_CHUNK_SIZE']
+    totals = {'deleted': 0, 'downsampled': 0, 'aggregates': 0}
+    
+    # Partitions first: whole expired months go without row-by-row deletes,
+    # and next month's partition exists before readings for it arrive
+    ensure_reading_partitions_ahead(now)
+    totals['partitions_dropped'] = len(drop_expired_reading_partitions(now))
+    
+    for rule, gardens in retention_rules().items():
+        cutoffs = retention_cutoffs(rule, gardens, now)
+        if not cutoffs:
+            continue
+        if rule.downsample:
+            downsampled, aggregates = downsample_before_cutoffs(cutoffs, rule.downsample, chunk_size)
+            totals['downsampled'] += downsampled
+            totals['aggregates'] += aggregates
+        else:
+            totals['deleted'] += delete_before_cutoffs(cutoffs, chunk_size)
+    
+    totals['duration_ms'] = round((time.monotonic() - started) * 1000, 1)
+    app.logger.info(f"Retention: {totals['deleted']} deleted, {totals['downsampled']} downsampled "
+                    f"into {totals['aggregates']} readings in {totals['duration_ms']} ms")
+    return totals
+
+def retention_cutoffs(rule, gardens, now):
+    """Per garden, the (timestamp, id) key below which readings have expired."""
+    cutoffs = {}
+    
+    if rule.keep_days is not None:
+        # id 0 sorts before every real id, so the whole cutoff instant survives
+        oldest_kept = (now - timedelta(days=rule.keep_days), 0)
+        cutoffs = {garden_id: oldest_kept for garden_id in gardens}
+    
+    if rule.keep_rows is not None:
+        # garden_stats tells us which gardens can possibly be over the limit
+        over_limit = [garden_id for garden_id, count in gardens.items() if count > rule.keep_rows]
+        for start in range(0, len(over_limit), 500):
+            for garden_id, key in nth_newest_readings(over_limit[start:start + 500], rule.keep_rows).items():
+                cutoffs[garden_id] = max(cutoffs.get(garden_id, key), key)
+    
+    return cutoffs
+
+def nth_newest_readings(garden_ids, n):
+    """(timestamp, id) of each garden's n-th newest reading, in one query."""
+    rows = nth_newest_readings_query(garden_ids, n).all()
+    return {garden_id: (timestamp, reading_id) for garden_id, timestamp, reading_id in rows}
+
+def nth_newest_readings_query(garden_ids, n):
+    ranked = db.session.query(
+        PlantReading.garden_id.label('garden_id'),
+        PlantReading.timestamp.label('timestamp'),
+        PlantReading.id.label('reading_id'),
+        db.func.row_number().over(
+            partition_by=PlantReading.garden_id,
+            order_by=(PlantReading.timestamp.desc(), PlantReading.id.desc())
+        ).label('position')
+    ).filter(PlantReading.garden_id.in_(garden_ids)).subquery()
+    
+    return db.session.query(ranked.c.garden_id, ranked.c.timestamp, ranked.c.reading_id)\
+                     .filter(ranked.c.position == n)
+
+def expired_condition(cutoffs):
+    return db.or_(*[
+        db.and_(PlantReading.garden_id == garden_id,
+                PlantReading.timestamp <= key[0],  # lets partitions be pruned, see readings_before
+                db.tuple_(PlantReading.timestamp, PlantReading.id) < key)
+        for garden_id, key in cutoffs.items()
+    ])
+
+def delete_before_cutoffs(cutoffs, chunk_size):
+    """Delete expired readings chunk by chunk, committing after each chunk."""
+    deleted = 0
+    garden_ids = list(cutoffs)
+    
+    for start in range(0, len(garden_ids), RETENTION_GARDENS_PER_STATEMENT):
+        batch = {garden_id: cutoffs[garden_id]
+                 for garden_id in garden_ids[start:start + RETENTION_GARDENS_PER_STATEMENT]}
+        while True:
+            expired = db.session.query(PlantReading.garden_id, PlantReading.id)\
+                                .filter(expired_condition(batch)).limit(chunk_size).all()
+            if not expired:
+                break
+            
+            PlantReading.query.filter(PlantReading.id.in_([reading_id for _, reading_id in expired]))\
+                              .delete(synchronize_session=False)
+            record_removed_readings(Counter(garden_id for garden_id, _ in expired))
+            db.session.commit()
+            deleted += len(expired)
+    
+    return deleted
+
+def raw_readings_query(garden_id, before):
+    """Readings of a garden older than before that are not themselves averages, oldest first."""
+    return garden_readings_query(garden_id, newest_first=False)\
+        .filter(PlantReading.timestamp < before)\
+        .filter(db.or_(PlantReading.notes.is_(None),
+                       PlantReading.notes.notin_(list(DOWNSAMPLED_NOTES.values()))))
+
+def downsample_bucket(garden_id, start, end, note):
+    """Average one bucket in the database, for buckets too large to load a chunk at a time.
+    
+    Returns how many readings were replaced by the one averaged reading.
+    """
+    bucket_readings = raw_readings_query(garden_id, end).filter(PlantReading.timestamp >= start).order_by(None)
+    count, *averages = bucket_readings.with_entities(
+        db.func.count(PlantReading.id),
+        *[db.func.avg(getattr(PlantReading, column)) for column in READING_VALUE_COLUMNS]
+    ).one()
+    
+    bucket_readings.delete(synchronize_session=False)
+    record_removed_readings({garden_id: count})
+    insert_readings([dict(zip(READING_VALUE_COLUMNS, [None if average is None else float(average)
+                                                      for average in averages]),
+                          garden_id=garden_id, timestamp=start, notes=note, is_manual=False)], derived=True)
+    db.session.commit()
+    return count
+
+def downsample_before_cutoffs(cutoffs, resolution, chunk_size):
+    """Replace expired readings with one averaged reading per hourly/daily bucket.
+    
+    Only whole buckets before the cutoff are compacted, so a bucket is never
+    split between raw and averaged readings. Returns (readings replaced,
+    averaged readings written).
+    """
+    bucket = DOWNSAMPLE_BUCKETS[resolution]
+    note = DOWNSAMPLED_NOTES[resolution]
+    replaced = written = 0
+    
+    for garden_id, (cutoff, _) in cutoffs.items():
+        boundary = floor_timestamp(cutoff, bucket)
+        while True:
+            rows = raw_readings_query(garden_id, boundary)\
+                .with_entities(PlantReading.id, PlantReading.timestamp,
+                               *[getattr(PlantReading, column) for column in READING_VALUE_COLUMNS])\
+                .limit(chunk_size).all()
+            if not rows:
+                break
+            
+            frame = pd.DataFrame(rows, columns=['id', 'timestamp', *READING_VALUE_COLUMNS])
+            frame['bucket'] = frame['timestamp'].dt.floor(bucket)
+            if len(rows) == chunk_size:
+                if frame['bucket'].nunique() == 1:
+                    # A single bucket holds more than chunk_size readings
+                    bucket_start = frame['bucket'].iloc[0].to_pydatetime()
+                    replaced += downsample_bucket(garden_id, bucket_start, bucket_start + bucket, note)
+                    written += 1
+                    continue
+                # The last bucket may continue past this chunk; leave it for the next one
+                frame = frame[frame['bucket'] != frame['bucket'].iloc[-1]]
+            
+            averages = frame.groupby('bucket')[list(READING_VALUE_COLUMNS)].mean()
+            averages = averages.astype(object).where(averages.notna(), None)
+            aggregates = [
+                dict(values, garden_id=garden_id, timestamp=bucket_start.to_pydatetime(),
+                     notes=note, is_manual=False)
+                for bucket_start, values in zip(averages.index, averages.to_dict('records'))
+            ]
+            
+            PlantReading.query.filter(PlantReading.id.in_(frame['id'].tolist()))\
+                              .delete(synchronize_session=False)
+            record_removed_readings({garden_id: len(frame)})
+            insert_readings(aggregates, derived=True)
+            db.session.commit()
+            replaced += len(frame)
+            written += len(aggregates)
+    
+    return replaced, written
+
+def run_retention_schedule():
+    """Background task applying retention policies every RETENTION_INTERVAL seconds"""
+    with app.app_context():
+        while True:
+            try:
+                run_retention()
+            except Exception as e:
+                app.logger.error(f"Retention error: {str(e)}")
+                db.session.rollback()
+            time.sleep(app.config['RETENTION_INTERVAL'])
+
+retention_cli = AppGroup('retention', help='Apply and manage reading retention policies.')
+
+@retention_cli.command('run')
+def retention_run_command():
+    """Apply all retention policies once."""
+    click.echo(run_retention())
+
+@retention_cli.command('set-policy')
+@click.option('--garden-id', type=int, help='Policy for a single garden.')
+@click.option('--sensor-type', help='Policy for every garden of a sensor type.')
+@click.option('--keep-rows', type=int, help='Keep only the newest N readings.')
+@click.option('--keep-days', type=int, help='Keep only readings from the last N days.')
+@click.option('--downsample', type=click.Choice(sorted(DOWNSAMPLE_BUCKETS)),
+              help='Average expired readings into buckets instead of deleting them.')
+def retention_set_policy_command(garden_id, sensor_type, keep_rows, keep_days, downsample):
+    """Create or replace a retention policy."""
+    if bool(garden_id) == bool(sensor_type):
+        raise click.UsageError('Pass exactly one of --garden-id or --sensor-type')
+    
+    policy = RetentionPolicy.query.filter_by(garden_id=garden_id, sensor_type=sensor_type).first()
+    if not policy:
+        policy = RetentionPolicy(garden_id=garden_id, sensor_type=sensor_type)
+        db.session.add(policy)
+    policy.keep_rows = keep_rows
+    policy.keep_days = keep_days
+    policy.downsample = downsample
+    db.session.commit()
+    click.echo(f'Saved {policy}')
+
+app.cli.add_command(retention_cli)
+
+@app.cli.command('rebuild-rollups')
+@click.option('--garden-id', type=int, help='Only rebuild this garden (default: all gardens).')
+@click.option('--missing', is_flag=True, help='Only build gardens with readings but no rollups yet.')
+def rebuild_rollups_command(garden_id, missing):
+    """Recompute hourly/daily rollups from the stored readings.
+    
+    Run with --missing once after upgrading (the Procfile's release step),
+    so rollups exist for readings stored before the rollup tables.
+    """
+    if missing:
+        garden_ids = ensure_rollups()
+    else:
+        garden_ids = [garden_id] if garden_id else [garden_id for (garden_id,) in db.session.query(Garden.id).all()]
+        rebuild_rollups(garden_ids)
+    click.echo(f'Rebuilt rollups for {len(garden_ids)} gardens')
+
+# Reading partitions (PostgreSQL, READINGS_PARTITIONING=monthly)
+READING_PARTITION_NAME = re.compile(r'^plant_readings_y(\d{4})m(\d{2})$')
+# Creating or dropping a partition locks plant_readings; give up rather than queue behind long readers
+PARTITION_LOCK_TIMEOUT = '5s'
+# pg_advisory_xact_lock key held while partitions are created
+PARTITION_LOCK_KEY = 0x706C616E7450  # 'plantP'
+
+# Month starts whose partition is known to exist in this process
+known_reading_partitions = set()
+reading_partitions_lock = threading.Lock()
+
+def month_start(timestamp):
+    return datetime(timestamp.year, timestamp.month, 1)
+
+def add_months(start, months):
+    index = start.year * 12 + start.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+def months_between(first, last):
+    """Month starts from first's month through last's month."""
+    months = [month_start(first)]
+    while months[-1] < month_start(last):
+        months.append(add_months(months[-1], 1))
+    return months
+
+def reading_partition_name(start):
+    return f'plant_readings_y{start.year}m{start.month:02d}'
+
+def list_reading_partitions(connection=None):
+    """{month start: partition name} of the partitions attached to plant_readings."""
+    names = (connection or db.session).execute(db.text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE parent.relname = 'plant_readings'"
+    )).scalars()
+    partitions = {}
+    for name in names:
+        match = READING_PARTITION_NAME.match(name)
+        if match:
+            partitions[datetime(int(match.group(1)), int(match.group(2)), 1)] = name
+    return partitions
+
+def ensure_reading_partitions(months):
+    """Create the monthly partitions for any of the given month starts that lack one.
+    
+    Each partition is created as a plain table and then attached. ATTACH
+    PARTITION only takes a SHARE UPDATE EXCLUSIVE lock on plant_readings,
+    which does not conflict with readers and writers, so the caller may
+    already have read or written plant_readings in its open transaction.
+    CREATE TABLE ... PARTITION OF would wait on that transaction's own
+    lock. The DDL runs on a separate connection and commits on its own; an
+    advisory lock serialises creators across processes.
+    """
+    missing = set(months) - known_reading_partitions
+    if not missing:
+        return
+    
+    with reading_partitions_lock:
+        missing -= known_reading_partitions
+        if not missing:
+            return
+        with db.engine.begin() as connection:
+            connection.execute(db.text(f"SET LOCAL lock_timeout = '{PARTITION_LOCK_TIMEOUT}'"))
+            connection.execute(db.text('SELECT pg_advisory_xact_lock(:key)'), {'key': PARTITION_LOCK_KEY})
+            attached = set(list_reading_partitions(connection))
+            for start in sorted(missing - attached):
+                name = reading_partition_name(start)
+                connection.execute(db.text(
+                    f'CREATE TABLE {name} (LIKE plant_readings INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'
+                ))
+                # Bounds are formatted in: DDL takes no bind parameters
+                connection.execute(db.text(
+                    f'ALTER TABLE plant_readings ATTACH PARTITION {name} '
+                    f"FOR VALUES FROM ('{start:%Y-%m-%d}') TO ('{add_months(start, 1):%Y-%m-%d}')"
+                ))
+                app.logger.info(f'Created reading partition {name}')
+        known_reading_partitions.update(missing)
+
+def ensure_reading_partitions_for(mappings):
+    """Make sure every reading about to be inserted has a partition to land in."""
+    if not PARTITION_READINGS:
+        return
+    now = datetime.utcnow()
+    ensure_reading_partitions({month_start(mapping.get('timestamp') or now) for mapping in mappings})
+
+def ensure_reading_partitions_ahead(now=None):
+    """Load the existing partitions and create this month's and the next READINGS_PARTITIONS_AHEAD."""
+    if not PARTITION_READINGS:
+        return
+    current = month_start(now or datetime.utcnow())
+    kind = db.session.execute(db.text(
+        "SELECT relkind FROM pg_class WHERE relname = 'plant_readings'"
+    )).scalar()
+    if kind != 'p':
+        raise RuntimeError('plant_readings already exists as a plain table; migrate its rows into a '
+                           'partitioned table before enabling READINGS_PARTITIONING')
+    with reading_partitions_lock:
+        known_reading_partitions.update(list_reading_partitions())
+    db.session.rollback()  # end the catalog read before taking DDL locks
+    ensure_reading_partitions(add_months(current, months)
+                              for months in range(app.config['READINGS_PARTITIONS_AHEAD'] + 1))
+
+def drop_expired_reading_partitions(now=None):
+    """Drop partitions older than READINGS_PARTITION_KEEP_MONTHS whole months.
+    
+    Dropping a partition removes a month of readings without deleting rows
+    one by one or leaving dead tuples to vacuum. garden_stats is lowered in
+    the same transaction; rollups are kept. Returns the dropped names.
+    """
+    keep_months = app.config['READINGS_PARTITION_KEEP_MONTHS']
+    if not PARTITION_READINGS or keep_months <= 0:
+        return []
+    
+    oldest_kept = add_months(month_start(now or datetime.utcnow()), -keep_months)
+    dropped = []
+    for start, name in sorted(list_reading_partitions().items()):
+        if add_months(start, 1) > oldest_kept:
+            continue
+        try:
+            counts = dict(db.session.execute(db.text(
+                f'SELECT garden_id, count(*) FROM {name} GROUP BY garden_id'
+            )).all())
+            db.session.execute(db.text(f"SET LOCAL lock_timeout = '{PARTITION_LOCK_TIMEOUT}'"))
+            db.session.execute(db.text(f'DROP TABLE {name}'))
+            record_removed_readings(counts)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        with reading_partitions_lock:
+            known_reading_partitions.discard(start)
+        dropped.append(name)
+        app.logger.info(f'Dropped reading partition {name} ({sum(counts.values())} readings)')
+    return dropped
+
+partitions_cli = AppGroup('partitions', help='Manage the monthly partitions of plant_readings.')
+
+def require_partitioning():
+    if not PARTITION_READINGS:
+        raise click.UsageError('Partitioning needs READINGS_PARTITIONING=monthly and a PostgreSQL DATABASE_URL')
+
+@partitions_cli.command('ensure')
+@click.option('--from', 'since', type=click.DateTime(formats=['%Y-%m']),
+              help='Also create partitions back to this month (e.g. before a backfill).')
+def partitions_ensure_command(since):
+    """Create missing partitions up to READINGS_PARTITIONS_AHEAD months ahead."""
+    require_partitioning()
+    ensure_reading_partitions_ahead()
+    if since:
+        ensure_reading_partitions(months_between(since, datetime.utcnow()))
+    click.echo(f'{len(known_reading_partitions)} partitions')
+
+@partitions_cli.command('list')
+def partitions_list_command():
+    """Show each partition with its estimated row count."""
+    require_partitioning()
+    for start, name in sorted(list_reading_partitions().items()):
+        rows = db.session.execute(db.text(
+            'SELECT reltuples::bigint FROM pg_class WHERE relname = :name'
+        ), {'name': name}).scalar()
+        click.echo(f'{name}  {start:%Y-%m-%d} .. {add_months(start, 1):%Y-%m-%d}  ~{max(rows, 0)} rows')
+
+@partitions_cli.command('drop-expired')
+def partitions_drop_expired_command():
+    """Drop partitions older than READINGS_PARTITION_KEEP_MONTHS."""
+    require_partitioning()
+    click.echo(f'Dropped: {", ".join(drop_expired_reading_partitions()) or "nothing"}')
+
+# Months far enough back that no real readings use them
+PARTITION_CHECK_MONTHS = [datetime(2000, 1, 1), datetime(2000, 2, 1)]
+
+@partitions_cli.command('check')
+def partitions_check_command():
+    """Check partition creation, routing and pruning against this database.
+    
+    Reads plant_readings and then inserts into two months that have no
+    partition, in one transaction as simulation_tick does. It then checks
+    that each month's rows landed in their own partition and that a
+    one-month query only scans that partition. The throwaway garden and
+    the two partitions are removed afterwards.
+    """
+    require_partitioning()
+    names = [reading_partition_name(start) for start in PARTITION_CHECK_MONTHS]
+    if set(PARTITION_CHECK_MONTHS) & set(list_reading_partitions()):
+        raise click.ClickException(f'{" or ".join(names)} already exists; drop it before running the check')
+    db.session.rollback()
+    
+    user = User(username=f'partitions-check-{os.getpid()}', password='-')
+    garden = Garden(owner=user, name='partitions-check', sensor_type='manual', stats=GardenStats(readings_count=0))
+    db.session.add_all([user, garden])
+    db.session.commit()
+    user_id, garden_id = user.id, garden.id
+    
+    failures = []
+    try:
+        garden_readings_query(garden_id).first()
+        insert_readings([
+            {'garden_id': garden_id, 'timestamp': start + timedelta(days=day), 'moisture_level': 50.0,
+             'temperature': 20.0, 'light_intensity': 500.0, 'is_manual': False}
+            for start in PARTITION_CHECK_MONTHS for day in range(3)
+        ])
+        db.session.commit()
+        
+        for name in names:
+            rows = db.session.execute(db.text(f'SELECT count(*) FROM {name} WHERE garden_id = :garden_id'),
+                                      {'garden_id': garden_id}).scalar()
+            click.echo(f'{name}: {rows} readings')
+            if rows != 3:
+                failures.append(f'{name} holds {rows} of its 3 readings')
+        
+        plan = explain_query(garden_readings_query(garden_id).filter(
+            PlantReading.timestamp >= PARTITION_CHECK_MONTHS[0], PlantReading.timestamp < PARTITION_CHECK_MONTHS[1]
+        ))
+        scanned = [name for name in names if any(name in line for line in plan)]
+        click.echo(f'one-month query scans: {", ".join(scanned) or "nothing"}')
+        if scanned != names[:1]:
+            failures.append('the one-month query was not pruned to its partition')
+    finally:
+        db.session.rollback()
+        delete_user(user_id)
+        with db.engine.begin() as connection:
+            connection.execute(db.text(f"SET LOCAL lock_timeout = '{PARTITION_LOCK_TIMEOUT}'"))
+            for name in names:
+                connection.execute(db.text(f'DROP TABLE IF EXISTS {name}'))
+        with reading_partitions_lock:
+            known_reading_partitions.difference_update(PARTITION_CHECK_MONTHS)
+    
+    if failures:
+        raise click.ClickException('; '.join(failures))
+    click.echo('Partitioning works')
+
+app.cli.add_command(partitions_cli)
+
+# Background tasks
+# The simulator and retention must run in exactly one process. Request
+# workers (e.g. several gunicorn workers) never start them on import; the
+# run-background command (or `python app.py` in development) does, and only
+# while it holds the leader lock. The weather prefetch is different: it warms
+# a per-process cache, so each web process runs its own (start_weather_prefetch).
+BACKGROUND_TASKS = {
+    'simulation': generate_simulated_data,
+    'retention': run_retention_schedule,
+}
+# pg_try_advisory_lock key shared by every process of this app
+BACKGROUND_LOCK_KEY = 0x706C616E74  # 'plant'
+# How often a standby retries the lock and the leader checks it still holds it
+LEADER_CHECK_INTERVAL = 15  # seconds
+
+background_lock = None
+
+def background_leader_lock():
+    if db.engine.dialect.name == 'postgresql':
+        return AdvisoryLeaderLock(db.engine, BACKGROUND_LOCK_KEY)
+    return FileLeaderLock(app.config['BACKGROUND_LOCK_FILE'])
+
+def start_background_tasks():
+    """Start every background task in a daemon thread if this process wins the leader lock."""
+    global background_lock
+    lock = background_lock or background_leader_lock()
+    if not lock.acquire():
+        app.logger.info('Background tasks are running in another process')
+        return False
+    
+    background_lock = lock
+    for name, task in BACKGROUND_TASKS.items():
+        threading.Thread(target=task, name=name, daemon=True).start()
+    app.logger.info(f"Started background tasks: {', '.join(BACKGROUND_TASKS)}")
+    return True
+
+@app.cli.command('run-background')
+@click.option('--wait/--no-wait', default=True,
+              help='Stand by until the current leader exits (default) or quit right away.')
+def run_background_command(wait):
+    """Run the simulator and retention in this process."""
+    while not start_background_tasks():
+        if not wait:
+            raise click.ClickException('Another process is already running the background tasks')
+        time.sleep(LEADER_CHECK_INTERVAL)
+    
+    while background_lock.held():
+        time.sleep(LEADER_CHECK_INTERVAL)
+    # Exiting stops the task threads; a standby (or the supervisor's restart) takes over
+    raise click.ClickException('Lost the background leader lock')
 
 # Register blueprints
 app.register_blueprint(auth_bp, url_prefix='/api')
@@ -850,13 +2739,625 @@ def internal_error(error):
     db.session.rollback()
     return jsonify({'error': 'Internal server error'}), 500
 
-# Create database tables and start simulation
+# Query plan checks
+from sqlalchemy import inspect
+from sqlalchemy.exc import IntegrityError, ProgrammingError
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.schema import CreateIndex
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+# Plan fragments that mean a hot readings query lost its index
+QUERY_PLAN_RED_FLAGS = {
+    'sqlite': ('SCAN plant_readings', 'USE TEMP B-TREE'),
+    'postgresql': ('Seq Scan on plant_readings', 'Sort'),
+}
+
+def hot_reading_queries(garden_id):
+    """The readings queries the API runs most, keyed by where they are used.
+    
+    tests/test_query_plans.py checks their plans against QUERY_PLAN_RED_FLAGS.
+    """
+    since = datetime.utcnow() - timedelta(days=7)
+    return {
+        'get_garden_readings': garden_readings_query(garden_id).limit(100).offset(100),
+        'get_garden_readings_by_cursor': readings_before(
+            garden_readings_query(garden_id), (datetime.utcnow(), 1)
+        ).limit(101),
+        'export_garden_data': garden_readings_query(garden_id, newest_first=False),
+        'get_prediction': garden_readings_query(garden_id).filter(PlantReading.timestamp >= since)
+                                                          .limit(PREDICTION_FIT_LIMIT),
+        'latest_reading': garden_readings_query(garden_id).with_entities(PlantReading.id).limit(1),
+        'simulation_tick': simulated_gardens_query(garden_ids=[garden_id]),
+        'retention_cutoff': nth_newest_readings_query([garden_id], 1000),
+        'retention_delete': db.session.query(PlantReading.garden_id, PlantReading.id)
+                              .filter(expired_condition({garden_id: (since, 0)})).limit(5000),
+    }
+
+class Explain(Executable, ClauseElement):
+    """EXPLAIN wrapper that keeps the wrapped statement's bound parameters."""
+    inherit_cache = False
+    
+    def __init__(self, statement):
+        self.statement = statement
+
+@compiles(Explain)
+def _compile_explain(element, compiler, **kw):
+    prefix = 'EXPLAIN QUERY PLAN' if compiler.dialect.name == 'sqlite' else 'EXPLAIN'
+    return f'{prefix} {compiler.process(element.statement, **kw)}'
+
+def explain_query(query):
+    """Return the database's plan for a query as a list of lines."""
+    if db.engine.dialect.name == 'postgresql':
+        # Small tables make a sequential scan look cheap; we want to know
+        # whether the index *can* serve the query
+        db.session.execute(db.text('SET LOCAL enable_seqscan = off'))
+    rows = db.session.execute(Explain(query.statement)).fetchall()
+    # SQLite puts the plan text in the last column, Postgres in the only one
+    return [row[-1] for row in rows]
+
+def ensure_indexes():
+    """create_all() skips indexes on tables that already exist; add any that are missing.
+    
+    Uses CREATE INDEX IF NOT EXISTS so workers starting together don't
+    trip over each other; PostgreSQL can still report a duplicate when two
+    creations overlap, which is fine as long as the index now exists.
+    """
+    for index in PlantReading.__table__.indexes:
+        try:
+            with db.engine.begin() as connection:
+                connection.execute(CreateIndex(index, if_not_exists=True))
+        except (IntegrityError, ProgrammingError):
+            existing = {existing['name'] for existing in inspect(db.engine).get_indexes(PlantReading.__tablename__)}
+            if index.name not in existing:
+                raise
+
+# Concurrency benchmark
+@app.cli.command('db-benchmark')
+@click.option('--readers', default=8, show_default=True, help='Threads paging through readings.')
+@click.option('--writers', default=4, show_default=True, help='Threads inserting readings.')
+@click.option('--seconds', default=10.0, show_default=True, help='How long to run.')
+@click.option('--batch-size', default=1, show_default=True, help='Readings per write transaction.')
+def db_benchmark(readers, writers, seconds, batch_size):
+    """Run simultaneous readers and writers against the configured database.
+    
+    Uses a throwaway user and garden (deleted afterwards) and reports
+    throughput, latency percentiles and errors such as "database is locked".
+    """
+    user = User(username=f'db-benchmark-{os.getpid()}', password='-')
+    garden = Garden(owner=user, name='db-benchmark', sensor_type='manual', stats=GardenStats(readings_count=0))
+    db.session.add_all([user, garden])
+    db.session.commit()
+    garden_id = garden.id
+    
+    deadline = time.monotonic() + seconds
+    results = {'read': [], 'write': []}
+    errors = Counter()
+    
+    def read_once():
+        garden_readings_query(garden_id).limit(100).all()
+    
+    def write_once():
+        now = datetime.utcnow()
+        insert_readings([{'garden_id': garden_id, 'timestamp': now, 'moisture_level': 50.0,
+                          'temperature': 20.0, 'light_intensity': 500.0, 'is_manual': False}
+                         for _ in range(batch_size)])
+        db.session.commit()
+    
+    def worker(kind, operation):
+        latencies = []
+        with app.app_context():
+            while time.monotonic() < deadline:
+                started = time.monotonic()
+                try:
+                    operation()
+                    latencies.append(time.monotonic() - started)
+                except Exception as e:
+                    db.session.rollback()
+                    errors[f'{kind}: {type(e).__name__}: {str(e).splitlines()[0][:80]}'] += 1
+        results[kind].extend(latencies)
+    
+    threads = [threading.Thread(target=worker, args=('read', read_once)) for _ in range(readers)]
+    threads += [threading.Thread(target=worker, args=('write', write_once)) for _ in range(writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    db.session.delete(db.session.get(Garden, garden_id))
+    db.session.delete(db.session.get(User, user.id))
+    db.session.commit()
+    with moisture_models_lock:
+        moisture_models.pop(garden_id, None)
+    
+    click.echo(f"{db.engine.dialect.name}, SQLITE_MODE={app.config['SQLITE_MODE']}: "
+               f"{readers} readers, {writers} writers, {seconds:g}s")
+    for kind, latencies in results.items():
+        latencies = np.sort(latencies) * 1000
+        if not len(latencies):
+            click.echo(f'{kind:>5}: no successful operations')
+            continue
+        click.echo(f'{kind:>5}: {len(latencies) / seconds:8.1f} ops/s  '
+                   f'p50 {np.percentile(latencies, 50):7.1f} ms  p95 {np.percentile(latencies, 95):7.1f} ms  '
+                   f'max {latencies[-1]:7.1f} ms')
+    for error, count in errors.most_common():
+        click.echo(f'error x{count}: {error}')
+    if errors:
+        raise SystemExit(1)
+
+# Endpoint benchmarks
+BENCHMARK_PASSWORD = 'benchmark-password'
+
+def delete_gardens(garden_ids, batch_size=500):
+    """Bulk-delete gardens with everything that references them, batch_size gardens per commit.
+    
+    Plain DELETE statements rather than the ORM cascade, which would load
+    every reading first.
+    """
+    garden_ids = list(garden_ids)
+    for start in range(0, len(garden_ids), batch_size):
+        batch = garden_ids[start:start + batch_size]
+        User.query.filter(User.last_active_garden_id.in_(batch))\
+                  .update({User.last_active_garden_id: None}, synchronize_session=False)
+        for model in (PlantReading, ReadingRollup, GardenStats, RetentionPolicy, ImportJob):
+            model.query.filter(model.garden_id.in_(batch)).delete(synchronize_session=False)
+        Garden.query.filter(Garden.id.in_(batch)).delete(synchronize_session=False)
+        db.session.commit()
+    with moisture_models_lock:
+        for garden_id in garden_ids:
+            moisture_models.pop(garden_id, None)
+
+def delete_user(user_id):
+    """Delete a user with all of their gardens and import jobs."""
+    delete_gardens([garden_id for (garden_id,) in db.session.query(Garden.id).filter_by(user_id=user_id).all()])
+    ImportJob.query.filter_by(user_id=user_id).delete(synchronize_session=False)
+    User.query.filter_by(id=user_id).delete(synchronize_session=False)
+    db.session.commit()
+    # Bulk deletes leave the deleted rows' objects in the identity map
+    db.session.expunge_all()
+    user_cache.invalidate(user_id)
+    garden_owner_cache.invalidate(user_id)
+
+def benchmark_client(username):
+    """Test client logged in as a new user; returns (client, user_id)."""
+    client = app.test_client()
+    credentials = {'username': username, 'password': BENCHMARK_PASSWORD}
+    client.post('/api/register', json=credentials)
+    response = client.post('/api/login', json=credentials)
+    if response.status_code != 200:
+        raise click.ClickException(f'Could not log in as {username}: {response.get_json()}')
+    return client, response.get_json()['user']['id']
+
+def time_requests(client, path, repeat):
+    """GET path repeat times; returns (latencies in ms, queries of the last request, response bytes)."""
+    latencies = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = client.get(path)
+        latencies.append((time.perf_counter() - started) * 1000)
+        if response.status_code != 200:
+            raise click.ClickException(f'GET {path} returned {response.status_code}')
+    return latencies, int(response.headers.get('X-Query-Count', -1)), len(response.get_data())
+
+@app.cli.command('gardens-benchmark')
+@click.option('--sizes', default='10,100,1000', show_default=True, help='Comma-separated gardens per user.')
+@click.option('--readings', default=10, show_default=True, help='Readings stored per garden.')
+@click.option('--repeat', default=20, show_default=True, help='Requests timed per size.')
+def gardens_benchmark(sizes, readings, repeat):
+    """Measure GET /api/gardens (queries and latency) as a user's garden count grows.
+    
+    Each size gets a throwaway user, deleted afterwards.
+    """
+    app.config['QUERY_COUNT_HEADER'] = True
+    click.echo(f'{db.engine.dialect.name}: {readings} readings per garden, {repeat} requests per size')
+    for size in [int(size) for size in sizes.split(',')]:
+        client, user_id = benchmark_client(f'gardens-benchmark-{os.getpid()}-{size}')
+        try:
+            now = datetime.utcnow()
+            db.session.execute(db.insert(Garden), [
+                {'user_id': user_id, 'name': f'garden-{number}', 'sensor_type': 'manual',
+                 'created_at': now, 'last_accessed': now}
+                for number in range(size)
+            ])
+            db.session.commit()
+            ensure_garden_stats()
+            garden_ids = [garden_id for (garden_id,) in db.session.query(Garden.id).filter_by(user_id=user_id).all()]
+            insert_readings([
+                {'garden_id': garden_id, 'timestamp': now - timedelta(minutes=minutes), 'moisture_level': 50.0,
+                 'temperature': 20.0, 'light_intensity': 500.0, 'is_manual': False}
+                for garden_id in garden_ids for minutes in range(readings)
+            ])
+            db.session.commit()
+            
+            latencies, queries, size_bytes = time_requests(client, '/api/gardens', repeat)
+            click.echo(f'{size:>6} gardens: {queries:3d} queries  p50 {np.percentile(latencies, 50):8.1f} ms  '
+                       f'p95 {np.percentile(latencies, 95):8.1f} ms  {size_bytes / 1024:8.1f} KiB')
+        finally:
+            delete_user(user_id)
+
+# Load generation
+import multiprocessing
+
+LOAD_TEST_USERNAME = 'simulate-load'
+LOAD_REPORT_INTERVAL = 5  # seconds
+
+def ensure_load_test_gardens(count, sensor_type='simulated_full', batch_size=5000):
+    """Make sure the load-test user owns at least count simulated gardens; returns how many were added."""
+    user = User.query.filter_by(username=LOAD_TEST_USERNAME).first()
+    if not user:
+        user = User(username=LOAD_TEST_USERNAME, password='-')
+        db.session.add(user)
+        db.session.commit()
+    
+    existing = Garden.query.filter_by(user_id=user.id).count()
+    now = datetime.utcnow()
+    for start in range(existing, count, batch_size):
+        db.session.execute(db.insert(Garden), [
+            {'user_id': user.id, 'name': f'load-{number}', 'sensor_type': sensor_type,
+             'created_at': now, 'last_accessed': now}
+            for number in range(start, min(start + batch_size, count))
+        ])
+        db.session.commit()
+    ensure_garden_stats()
+    return max(0, count - existing)
+
+def run_simulation_shard(user_id, shard, shards, seconds, interval, reports):
+    """Load-generator process: tick user_id's gardens with id % shards == shard until seconds have passed.
+    
+    Each tick is reported as (shard, readings inserted, tick duration in
+    ms, error); (shard, None, None, None) marks the end of the shard.
+    """
+    with app.app_context():
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            started = time.monotonic()
+            try:
+                tick = simulation_tick(shard=(shard, shards), user_id=user_id)
+                reports.put((shard, tick['inserted'], tick['duration_ms'], None))
+            except Exception as e:
+                db.session.rollback()
+                reports.put((shard, 0, None, f'{type(e).__name__}: {str(e).splitlines()[0][:80]}'))
+            time.sleep(max(0, interval - (time.monotonic() - started)))
+    reports.put((shard, None, None, None))
+
+@app.cli.command('simulate-load')
+@click.option('--shards', default=os.cpu_count(), show_default=True,
+              help='Processes; each one owns the load-test gardens with id % shards == its index.')
+@click.option('--seconds', default=60.0, show_default=True, help='How long to run.')
+@click.option('--interval', default=0.0, show_default=True,
+              help='Seconds between the ticks of one shard (0: back to back).')
+@click.option('--gardens', type=int,
+              help=f'First make sure the {LOAD_TEST_USERNAME} user owns this many simulated gardens.')
+def simulate_load_command(shards, seconds, interval, gardens):
+    """Drive write load with simulated readings from a pool of processes.
+    
+    Every shard runs the regular set-based simulation_tick on its slice of
+    the load-test user's simulated gardens, never on real users' gardens,
+    and bulk-writes its own readings, so throughput
+    scales with cores instead of being capped by one Python thread. Best run
+    against PostgreSQL: SQLite still serialises writers across processes.
+    """
+    if gardens:
+        click.echo(f'Added {ensure_load_test_gardens(gardens)} load-test gardens')
+    user = User.query.filter_by(username=LOAD_TEST_USERNAME).first()
+    if not user:
+        raise click.UsageError(f'The {LOAD_TEST_USERNAME} user has no gardens yet; pass --gardens')
+    user_id = user.id
+    simulated = Garden.query.filter(Garden.user_id == user_id,
+                                    Garden.sensor_type.in_(SIMULATED_SENSOR_TYPES)).count()
+    # Shards open their own connections; none may be inherited from here
+    db.session.remove()
+    db.engine.dispose()
+    
+    context = multiprocessing.get_context('spawn')
+    reports = context.Queue()
+    processes = [context.Process(target=run_simulation_shard, name=f'simulation-shard-{shard}',
+                                 args=(user_id, shard, shards, seconds, interval, reports))
+                 for shard in range(shards)]
+    for process in processes:
+        process.start()
+    click.echo(f'{simulated} simulated gardens across {shards} shards for {seconds:g}s')
+    
+    totals = {'readings': 0, 'ticks': 0, 'tick_ms': 0.0}
+    errors = Counter()
+    running = set(range(shards))
+    started = None
+    window_start, window_readings = time.monotonic(), 0
+    while running:
+        try:
+            shard, inserted, duration_ms, error = reports.get(timeout=1)
+        except queue.Empty:
+            if not any(process.is_alive() for process in processes):
+                break
+            continue
+        if inserted is None:
+            running.discard(shard)
+            continue
+        
+        # Throughput is measured from the first tick, after every shard has started up
+        started = started or time.monotonic() - (duration_ms or 0) / 1000
+        if error:
+            errors[error] += 1
+        else:
+            totals['readings'] += inserted
+            totals['ticks'] += 1
+            totals['tick_ms'] += duration_ms
+            window_readings += inserted
+        
+        if time.monotonic() - window_start >= LOAD_REPORT_INTERVAL:
+            click.echo(f'{window_readings / (time.monotonic() - window_start):10.0f} readings/s')
+            window_start, window_readings = time.monotonic(), 0
+    
+    for process in processes:
+        process.join()
+    
+    elapsed = time.monotonic() - started if started else 0
+    click.echo(f"{totals['readings']} readings in {totals['ticks']} ticks: "
+               f"{totals['readings'] / elapsed if elapsed else 0:.0f} readings/s, "
+               f"mean tick {totals['tick_ms'] / totals['ticks'] if totals['ticks'] else 0:.1f} ms")
+    for error, count in errors.most_common():
+        click.echo(f'error x{count}: {error}')
+    if errors:
+        raise SystemExit(1)
+
+@app.cli.command('simulate-load-cleanup')
+def simulate_load_cleanup_command():
+    """Delete the load-test user with all of its gardens and readings."""
+    user = User.query.filter_by(username=LOAD_TEST_USERNAME).first()
+    if not user:
+        click.echo(f'No {LOAD_TEST_USERNAME} user')
+        return
+    gardens = Garden.query.filter_by(user_id=user.id).count()
+    delete_user(user.id)
+    click.echo(f'Deleted the {LOAD_TEST_USERNAME} user and its {gardens} gardens')
+
+# Historical backfill
+from backend.utils.simulation import generate_history
+
+# Readings generated, written and committed together
+BACKFILL_CHUNK_ROWS = 200000
+
+def copy_readings(frame):
+    """Bulk-load a DataFrame whose columns are PlantReading columns.
+    
+    psycopg2 gets the rows through COPY, other drivers through a single
+    executemany of plain rows. Unlike insert_readings this leaves
+    garden_stats, rollups and moisture models to the caller.
+    """
+    connection = db.session.connection()
+    cursor = connection.connection.cursor()
+    if hasattr(cursor, 'copy_expert'):
+        buffer = io.StringIO()
+        frame.to_csv(buffer, index=False, header=False, date_format='%Y-%m-%d %H:%M:%S.%f')
+        buffer.seek(0)
+        columns = ', '.join(f'"{column}"' for column in frame.columns)
+        cursor.copy_expert(f'COPY plant_readings ({columns}) FROM STDIN WITH (FORMAT csv)', buffer)
+        return
+    
+    values = frame.to_numpy(dtype=object)
+    values[frame.isna().to_numpy()] = None
+    fields = list(frame.columns)
+    connection.execute(PlantReading.__table__.insert(), [dict(zip(fields, row)) for row in values.tolist()])
+
+def backfill_readings(garden_ids, start, end, interval, seed=0, chunk_rows=BACKFILL_CHUNK_ROWS,
+                      on_progress=None):
+    """Synthesize simulated readings every interval from start to end for each garden.
+    
+    Values come from the simulator's own sensor models, stepped through
+    the synthetic timestamps with a seeded RNG, so the same arguments
+    always produce the same history. Each chunk of about chunk_rows readings
+    is bulk-loaded, folded into the rollups and garden_stats, and committed.
+    Returns how many readings were inserted.
+    """
+    sensor_types = dict(db.session.query(Garden.id, Garden.sensor_type).filter(Garden.id.in_(garden_ids)).all())
+    garden_ids = np.array(sorted(sensor_types), dtype=np.int64)
+    if not len(garden_ids):
+        return 0
+    basic = np.array([sensor_types[garden_id] != 'simulated_full' for garden_id in garden_ids.tolist()])
+    
+    timestamps = pd.date_range(start, end, freq=interval)
+    if PARTITION_READINGS:
+        ensure_reading_partitions(months_between(start, end))
+    
+    rng = np.random.default_rng(seed)
+    previous = {column: np.full(len(garden_ids), np.nan) for column in READING_VALUE_COLUMNS}
+    steps_per_chunk = max(1, chunk_rows // len(garden_ids))
+    inserted = 0
+    for first in range(0, len(timestamps), steps_per_chunk):
+        chunk = timestamps[first:first + steps_per_chunk]
+        history = generate_history(previous, chunk.to_pydatetime(), rng)
+        previous = {column: values[-1] for column, values in history.items()}
+        
+        # Step-major rows: every garden's reading for one timestamp, then the next
+        frame = pd.DataFrame({
+            'garden_id': np.tile(garden_ids, len(chunk)),
+            'timestamp': np.repeat(chunk.values, len(garden_ids)),
+            **{column: values.ravel() for column, values in history.items()},
+            'is_manual': False,
+        })
+        frame.loc[np.tile(basic, len(chunk)), list(FULL_SENSOR_ONLY_COLUMNS)] = np.nan
+        
+        copy_readings(frame)
+        upsert_rollups(aggregate_rollups_frame(frame))
+        record_new_readings({garden_id: len(chunk) for garden_id in garden_ids.tolist()})
+        db.session.commit()
+        
+        inserted += len(frame)
+        if on_progress:
+            on_progress(inserted, len(timestamps) * len(garden_ids))
+    
+    # Cached models never saw the history; refit on next use
+    with moisture_models_lock:
+        for garden_id in garden_ids.tolist():
+            moisture_models.pop(garden_id, None)
+    return inserted
+
+def exempt_from_retention(garden_ids):
+    """Give each garden without a retention policy of its own one that keeps every reading.
+    
+    Returns how many policies were added.
+    """
+    with_policy = {garden_id for (garden_id,) in db.session.query(RetentionPolicy.garden_id)
+                   .filter(RetentionPolicy.garden_id.in_(garden_ids)).all()}
+    added = [{'garden_id': garden_id} for garden_id in sorted(set(garden_ids) - with_policy)]
+    if added:
+        db.session.execute(db.insert(RetentionPolicy), added)
+        db.session.commit()
+    return len(added)
+
+@app.cli.command('backfill-readings')
+@click.option('--days', default=30.0, show_default=True, help='Days of history to generate.')
+@click.option('--interval', default=60, show_default=True, help='Seconds between readings.')
+@click.option('--end', type=click.DateTime(), help='Time of the last reading (UTC, default now).')
+@click.option('--garden-id', 'garden_ids', type=int, multiple=True, help='Garden to backfill (repeatable).')
+@click.option('--gardens', type=int,
+              help=f'Backfill the first N gardens of the {LOAD_TEST_USERNAME} user, creating them as needed.')
+@click.option('--seed', default=0, show_default=True, help='RNG seed; equal arguments give equal histories.')
+@click.option('--apply-retention', is_flag=True,
+              help='Leave the gardens under their retention policies instead of exempting them.')
+def backfill_readings_command(days, interval, end, garden_ids, gardens, seed, apply_retention):
+    """Generate simulated reading history in bulk.
+    
+    The retention defaults would trim the history on the next retention
+    run, so gardens without a policy of their own get an exempting one
+    (no keep_rows, no keep_days) unless --apply-retention is passed.
+    """
+    if bool(garden_ids) == bool(gardens):
+        raise click.UsageError('Pass either --garden-id or --gardens')
+    if gardens:
+        ensure_load_test_gardens(gardens)
+        user = User.query.filter_by(username=LOAD_TEST_USERNAME).one()
+        garden_ids = [garden_id for (garden_id,) in db.session.query(Garden.id).filter_by(user_id=user.id)
+                      .order_by(Garden.id).limit(gardens).all()]
+    
+    # Before writing, so a retention run cannot trim the history halfway through
+    exempted = 0 if apply_retention else exempt_from_retention(garden_ids)
+    end = end or datetime.utcnow()
+    started = time.monotonic()
+    
+    def report(inserted, total):
+        click.echo(f'{inserted}/{total} readings, {inserted / (time.monotonic() - started):.0f}/s')
+    
+    inserted = backfill_readings(garden_ids, end - timedelta(days=days), end, timedelta(seconds=interval),
+                                 seed=seed, on_progress=report)
+    click.echo(f'Inserted {inserted} readings for {len(garden_ids)} gardens in {time.monotonic() - started:.1f}s')
+    if not apply_retention:
+        click.echo(f'Exempted {exempted} gardens from retention; '
+                   'change with flask --app app retention set-policy --garden-id ID')
+
+@app.cli.command('pagination-benchmark')
+@click.option('--readings', default=1000000, show_default=True, help='Readings in the throwaway garden.')
+@click.option('--per-page', default=100, show_default=True, help='Readings per page.')
+@click.option('--pages', default='1,10,100,1000,5000', show_default=True,
+              help='Comma-separated page numbers to compare.')
+@click.option('--repeat', default=5, show_default=True, help='Requests timed per page and mode.')
+def pagination_benchmark(readings, per_page, pages, repeat):
+    """Compare ?page= offsets with ?before= cursors at the same depth of a large garden.
+    
+    The garden is backfilled with one reading a minute and deleted afterwards.
+    """
+    app.config['QUERY_COUNT_HEADER'] = True
+    client, user_id = benchmark_client(f'pagination-benchmark-{os.getpid()}')
+    try:
+        garden = Garden(user_id=user_id, name='pagination-benchmark', sensor_type='manual',
+                        stats=GardenStats(readings_count=0))
+        db.session.add(garden)
+        db.session.commit()
+        garden_id = garden.id
+        
+        started = time.monotonic()
+        end = datetime.utcnow().replace(microsecond=0)
+        backfill_readings([garden_id], end - timedelta(minutes=readings - 1), end, timedelta(minutes=1))
+        click.echo(f'{db.engine.dialect.name}: {garden_readings_total(garden_id)} readings backfilled '
+                   f'in {time.monotonic() - started:.1f}s, {per_page} per page, {repeat} requests each')
+        
+        for page in [int(page) for page in pages.split(',')]:
+            offset = (page - 1) * per_page
+            if offset >= readings:
+                click.echo(f'page {page}: past the last reading, skipped')
+                continue
+            paged_path = f'/api/gardens/{garden_id}/readings?page={page}&per_page={per_page}'
+            cursor_path = f'/api/gardens/{garden_id}/readings?limit={per_page}'
+            if offset:
+                # The cursor a client would hold after reading the previous page
+                previous = garden_readings_query(garden_id).offset(offset - 1).first()
+                cursor_path += f'&before={encode_reading_cursor(previous)}'
+            
+            paged_ms, paged_queries, _ = time_requests(client, paged_path, repeat)
+            cursor_ms, cursor_queries, _ = time_requests(client, cursor_path, repeat)
+            same = client.get(paged_path).get_json()['readings'] == client.get(cursor_path).get_json()['readings']
+            click.echo(f'page {page:>6}: offset p50 {np.percentile(paged_ms, 50):8.1f} ms ({paged_queries} queries)  '
+                       f'cursor p50 {np.percentile(cursor_ms, 50):8.1f} ms ({cursor_queries} queries)'
+                       f'{"" if same else "  RESULTS DIFFER"}')
+    finally:
+        delete_user(user_id)
+
+@app.cli.command('import-benchmark')
+@click.option('--rows', default=200000, show_default=True, help='Rows in the generated CSV file.')
+@click.option('--repeat', default=3, show_default=True, help='Runs per engine; the fastest is reported.')
+@click.option('--insert', is_flag=True, help='Also insert the readings into a throwaway garden.')
+def import_benchmark(rows, repeat, insert):
+    """Compare the csv and pandas import engines in rows/s on the same generated file.
+    
+    The file looks like an export: ISO timestamps, one optional column left
+    empty in every other row. Without --insert only parsing and validation
+    are timed; with it each batch is inserted and committed as an import
+    job does, into a garden deleted afterwards.
+    """
+    start = datetime.utcnow().replace(microsecond=0) - timedelta(minutes=rows)
+    body = b''.join(export_readings(
+        (start + timedelta(minutes=number), 20 + number % 60, 21.5, 800.0,
+         55.0 if number % 2 else None, 6.5, '', True)
+        for number in range(rows)
+    ))
+    
+    user_id = None
+    if insert:
+        user = User(username=f'import-benchmark-{os.getpid()}', password='-')
+        garden = Garden(owner=user, name='import-benchmark', sensor_type='manual',
+                        stats=GardenStats(readings_count=0))
+        db.session.add_all([user, garden])
+        db.session.commit()
+        user_id, garden_id = user.id, garden.id
+    
+    def discard(batch):
+        pass
+    
+    def commit(progress):
+        db.session.commit()
+    
+    try:
+        click.echo(f'{rows} rows ({len(body) / 1e6:.1f} MB), {IMPORT_BATCH_SIZE} per batch, '
+                   f'{"parse and insert" if insert else "parse only"}, best of {repeat}')
+        for engine in ('csv', 'pandas'):
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                result = import_readings(io.BytesIO(body), garden_id if insert else 0,
+                                         insert_readings if insert else discard,
+                                         batch_size=IMPORT_BATCH_SIZE, on_progress=commit if insert else None,
+                                         engine=engine)
+                timings.append(time.perf_counter() - started)
+            click.echo(f'{engine:>6}: {result["imported"] / min(timings):10.0f} rows/s '
+                       f'({result["imported"]} imported, {result["rejected"]} rejected)')
+    finally:
+        if user_id:
+            delete_user(user_id)
+
+# Create database tables (background tasks are started separately, see above)
 with app.app_context():
     db.create_all()
+    ensure_indexes()
+    ensure_garden_stats()
+    ensure_reading_partitions_ahead()
+    fail_interrupted_import_jobs()
     
-    # Start simulation in background thread
-    simulation_thread = threading.Thread(target=generate_simulated_data, daemon=True)
-    simulation_thread.start()
+    if app.config['INGEST_MODE'] == 'buffered':
+        start_ingest_buffer()
 
 if __name__ == '__main__':
+    # The development server runs the background tasks itself unless a
+    # run-background process already does
+    with app.app_context():
+        ensure_rollups()
+        start_background_tasks()
     app.run(debug=True, host='0.0.0.0', port=5000, threaded=True)
\ No newline at end of file
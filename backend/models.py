@@ -45,3 +45,6 @@ class PlantReading(db.Model):
     ph_level = db.Column(db.Float, nullable=True)
     notes = db.Column(db.Text, nullable=True)
     is_manual = db.Column(db.Boolean, default=False)
+    __table_args__ = (
+        db.Index('ix_plant_readings_garden_timestamp', 'garden_id', 'timestamp', 'id'),
+    )
@@ -1,9 +1,10 @@
 # Data import/export and analytics routes blueprint
-from flask import Blueprint, request, jsonify, Response
+from flask import Blueprint, request, jsonify, Response, stream_with_context
 from flask_login import login_required, current_user
 from models import Garden, PlantReading, db
-from utils.csv_handler import import_readings, export_readings
-from utils.analytics import predict_next_watering
+from utils.csv_handler import import_readings, export_readings, EXPORT_COLUMNS
+from datetime import datetime, timedelta
+from utils.analytics import MoistureModel, predict_next_watering
 
 data_bp = Blueprint('data', __name__)
 
@@ -20,9 +21,15 @@ def import_garden_data(garden_id):
         return jsonify({'error': 'No file selected'}), 400
     if not file.filename.endswith('.csv'):
         return jsonify({'error': 'Only CSV files allowed'}), 400
-    import_readings(file.stream, current_user.id, garden_id)
-    db.session.commit()
-    return jsonify({'message': 'Data imported'}), 200
+    def insert_batch(mappings):
+        db.session.bulk_insert_mappings(PlantReading, mappings)
+        db.session.commit()
+    result = import_readings(file.stream, garden_id, insert_batch)
+    return jsonify({
+        'message': 'Data imported',
+        'imported_count': result['imported'],
+        'rejected_count': result['rejected']
+    }), 200
 
 @data_bp.route('/gardens/<int:garden_id>/export_data', methods=['GET'])
 @login_required
@@ -30,9 +37,12 @@ def export_garden_data(garden_id):
     garden = Garden.query.filter_by(id=garden_id, user_id=current_user.id).first()
     if not garden:
         return jsonify({'error': 'Garden not found'}), 404
-    csv_data = export_readings(current_user.id, garden_id)
+    rows = PlantReading.query.filter_by(garden_id=garden_id)\
+        .order_by(PlantReading.timestamp.asc())\
+        .with_entities(*[getattr(PlantReading, column) for column in EXPORT_COLUMNS])\
+        .yield_per(1000)
     return Response(
-        csv_data,
+        stream_with_context(export_readings(rows)),
         mimetype='text/csv',
         headers={
             'Content-Disposition': f'attachment; filename=garden_{garden_id}_data.csv'
@@ -45,5 +55,9 @@ def get_prediction(garden_id):
     garden = Garden.query.filter_by(id=garden_id, user_id=current_user.id).first()
     if not garden:
         return jsonify({'error': 'Garden not found'}), 404
-    prediction = predict_next_watering(garden_id, current_user.id)
-    return jsonify({'next_watering_estimate': prediction}), 200
+    readings = PlantReading.query.filter_by(garden_id=garden_id)\
+        .filter(PlantReading.timestamp >= datetime.utcnow() - timedelta(days=14))\
+        .order_by(PlantReading.timestamp.asc())\
+        .with_entities(PlantReading.timestamp, PlantReading.moisture_level).all()
+    model = MoistureModel.fit(*zip(*readings)) if readings else None
+    return jsonify(predict_next_watering(model, current_user.moisture_threshold)), 200
@@ -1,6 +1,164 @@
 # Predictive analytics for plant care
-import pandas as pd
+from datetime import datetime, timedelta
 
-def predict_next_watering(garden_id, user_id):
-    # ...fetch readings, analyze, and predict next watering time...
-    return "2025-08-01T14:00:00"
+import numpy as np
+
+# A rise of more than this many moisture points between readings is a watering
+WATERING_JUMP = 10.0
+# Readings since the last watering needed before a decline rate is trusted
+MIN_FIT_READINGS = 3
+
+def _to_days(timestamps):
+    """Datetimes (or datetime64 values) as float days since the epoch."""
+    return np.asarray(timestamps, dtype='datetime64[us]').astype(np.int64) / 86400e6
+
+class MoistureModel:
+    """Least-squares fit of moisture against time since the last watering.
+
+    Only the running sums of the regression are kept, so readings can be
+    folded in as they arrive (update) and the fit is read back in O(1)
+    instead of re-querying and re-fitting recent readings. A moisture jump
+    larger than WATERING_JUMP starts a new drying segment.
+    """
+
+    def __init__(self):
+        self.last_timestamp = None
+        self.last_moisture = None
+        self.last_watered = None
+        self._reset(None)
+
+    def _reset(self, origin):
+        # Times are stored relative to the segment start to keep the sums well conditioned
+        self.origin = origin
+        self.count = 0
+        self.sum_t = self.sum_y = self.sum_tt = self.sum_ty = 0.0
+
+    @classmethod
+    def fit(cls, timestamps, moisture):
+        model = cls()
+        model.update(timestamps, moisture)
+        return model
+
+    @classmethod
+    def fit_many(cls, garden_ids, timestamps, moisture):
+        """Fit one model per garden in a single vectorised pass.
+
+        The three sequences describe readings sorted by garden, then by
+        timestamp. Returns {garden_id: MoistureModel}, each equivalent to
+        fit() on that garden's readings alone.
+        """
+        size = len(garden_ids)
+        if size == 0:
+            return {}
+
+        garden_ids = np.asarray(garden_ids)
+        days = _to_days(timestamps)
+        moisture = np.asarray(moisture, dtype=float)
+        positions = np.arange(size)
+
+        group_starts = np.flatnonzero(np.r_[True, garden_ids[1:] != garden_ids[:-1]])
+        group_ends = np.r_[group_starts[1:], size] - 1
+        group_of_row = np.repeat(np.arange(len(group_starts)), group_ends - group_starts + 1)
+
+        # A segment starts at each garden's first reading and after each watering jump;
+        # only the last segment of every garden is fitted
+        watered = np.r_[False, np.diff(moisture) > WATERING_JUMP]
+        watered[group_starts] = False
+        segment_starts = np.maximum.accumulate(np.where(watered, positions, 0))
+        segment_starts = np.maximum(segment_starts, group_starts[group_of_row])
+        starts = segment_starts[group_ends]
+
+        in_segment = positions >= starts[group_of_row]
+        t = np.where(in_segment, days - days[starts][group_of_row], 0.0)
+        y = np.where(in_segment, moisture, 0.0)
+
+        def per_garden(values):
+            return np.bincount(group_of_row, weights=values, minlength=len(group_starts))
+
+        counts, sums_t, sums_y = per_garden(in_segment), per_garden(t), per_garden(y)
+        sums_tt, sums_ty = per_garden(t * t), per_garden(t * y)
+
+        models = {}
+        for group, garden_id in enumerate(garden_ids[group_starts].tolist()):
+            model = cls()
+            start, end = starts[group], group_ends[group]
+            model.origin = days[start]
+            model.count = int(counts[group])
+            model.sum_t, model.sum_y = sums_t[group], sums_y[group]
+            model.sum_tt, model.sum_ty = sums_tt[group], sums_ty[group]
+            model.last_timestamp = timestamps[end]
+            model.last_moisture = float(moisture[end])
+            model.last_watered = timestamps[start] if watered[start] else None
+            models[garden_id] = model
+        return models
+
+    def update(self, timestamps, moisture):
+        """Fold readings (in timestamp order, all newer than last_timestamp) into the fit."""
+        if len(timestamps) == 0:
+            return
+
+        days = _to_days(timestamps)
+        moisture = np.asarray(moisture, dtype=float)
+
+        # Compare each reading with the one before it, including the last one already seen
+        previous = np.concatenate(([np.nan if self.last_moisture is None else self.last_moisture],
+                                   moisture[:-1]))
+        jumps = np.flatnonzero(moisture - previous > WATERING_JUMP)
+        start = 0
+        if jumps.size:
+            start = jumps[-1]
+            self.last_watered = timestamps[start]
+            self._reset(days[start])
+        elif self.origin is None:
+            self._reset(days[0])
+
+        t = days[start:] - self.origin
+        y = moisture[start:]
+        self.count += len(t)
+        self.sum_t += t.sum()
+        self.sum_y += y.sum()
+        self.sum_tt += (t * t).sum()
+        self.sum_ty += (t * y).sum()
+
+        self.last_timestamp = timestamps[-1]
+        self.last_moisture = float(moisture[-1])
+
+    @property
+    def decline_per_day(self):
+        """Moisture points lost per day in the current segment (None until it can be fitted)."""
+        if self.count < MIN_FIT_READINGS:
+            return None
+        spread = self.count * self.sum_tt - self.sum_t ** 2
+        if spread <= 0:
+            return None
+        slope = (self.count * self.sum_ty - self.sum_t * self.sum_y) / spread
+        return -slope
+
+def predict_next_watering(model, moisture_threshold, now=None):
+    """Turn a fitted MoistureModel into the prediction the API returns."""
+    if model is None or model.count < MIN_FIT_READINGS:
+        return {
+            'next_watering_estimate': 'Not enough data',
+            'recommendation': 'Add more readings to get predictions'
+        }
+
+    decline = model.decline_per_day
+    if not decline or decline <= 0:
+        return {
+            'next_watering_estimate': 'Unable to calculate',
+            'current_moisture': model.last_moisture,
+            'recommendation': 'Monitor moisture levels'
+        }
+
+    now = now or datetime.utcnow()
+    elapsed_days = (now - model.last_timestamp).total_seconds() / 86400
+    days_until_watering = max(0.0, (model.last_moisture - moisture_threshold) / decline - elapsed_days)
+
+    return {
+        'next_watering_estimate': (now + timedelta(days=days_until_watering)).isoformat(),
+        'days_until_watering': round(days_until_watering, 1),
+        'current_moisture': model.last_moisture,
+        'decline_per_day': round(decline, 2),
+        'last_watered': model.last_watered.isoformat() if model.last_watered else None,
+        'recommendation': "Water soon" if days_until_watering < 1 else "Plant is healthy"
+    }
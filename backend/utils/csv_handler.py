@@ -1,8 +1,381 @@
 # CSV import/export logic for plant readings
-def import_readings(file_stream, user_id, garden_id):
-    # ...parse CSV and insert readings into DB...
-    pass
+import codecs
+import csv
+import io
+import itertools
+import zlib
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd
 
-def export_readings(user_id, garden_id):
-    # ...query readings and return CSV string...
-    pass
+# Column order of exported files (and of the rows export_readings expects)
+EXPORT_COLUMNS = [
+    'timestamp', 'moisture_level', 'temperature', 'light_intensity',
+    'humidity', 'ph_level', 'notes', 'is_manual'
+]
+
+# Rejected rows are counted in full but only this many are described
+MAX_REPORTED_ERRORS = 20
+
+def parse_reading_row(row, garden_id):
+    """Turn one CSV row into a plant_readings mapping.
+
+    Accepts both the export's column names and the capitalised ones some
+    loggers write (Timestamp, Moisture, Temperature, Light). Raises
+    ValueError (or TypeError for truncated rows) when a row cannot be parsed.
+    """
+    timestamp_str = row.get('timestamp', row.get('Timestamp', ''))
+    if timestamp_str:
+        timestamp = datetime.fromisoformat(timestamp_str.replace('Z', '+00:00'))
+        if timestamp.tzinfo:
+            # Readings are stored as naive UTC
+            timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    else:
+        timestamp = datetime.utcnow()
+
+    return {
+        'garden_id': garden_id,
+        'timestamp': timestamp,
+        'moisture_level': float(row.get('moisture_level', row.get('Moisture', 0))),
+        'temperature': float(row.get('temperature', row.get('Temperature', 0))),
+        'light_intensity': float(row.get('light_intensity', row.get('Light', 0))),
+        'humidity': float(row['humidity']) if row.get('humidity') else None,
+        'ph_level': float(row['ph_level']) if row.get('ph_level') else None,
+        'notes': row.get('notes') or '',
+        'is_manual': True
+    }
+
+# Accepted spellings of each reading column, in order of preference
+COLUMN_ALIASES = {
+    'timestamp': ('timestamp', 'Timestamp'),
+    'moisture_level': ('moisture_level', 'Moisture'),
+    'temperature': ('temperature', 'Temperature'),
+    'light_intensity': ('light_intensity', 'Light'),
+    'humidity': ('humidity',),
+    'ph_level': ('ph_level',),
+    'notes': ('notes',),
+}
+TEXT_COLUMN_DTYPES = {
+    column: str for field in ('timestamp', 'notes') for column in COLUMN_ALIASES[field]
+}
+REQUIRED_NUMERIC = ('moisture_level', 'temperature', 'light_intensity')
+OPTIONAL_NUMERIC = ('humidity', 'ph_level')
+
+def resolve_columns(header):
+    """Map each reading field to the header column that supplies it (or None)."""
+    return {
+        field: next((alias for alias in aliases if alias in header), None)
+        for field, aliases in COLUMN_ALIASES.items()
+    }
+
+def import_readings(file_stream, garden_id, insert_batch, batch_size=1000,
+                    on_progress=None, engine='csv'):
+    """Parse a CSV upload incrementally and hand it over in batches.
+
+    file_stream is the binary upload; it is decoded as it is read, so only
+    one batch of parsed rows is held at a time. insert_batch(mappings) is
+    called for each batch of valid rows and is expected to write (and
+    commit) them. on_progress(result), if given, is called after each batch
+    with the running totals. Returns the final totals: imported, rejected,
+    batches and a sample of errors.
+
+    engine='csv' parses row by row with the csv module; engine='pandas'
+    reads blocks of records with pandas' C parser and validates them
+    column-wise (flask import-benchmark compares the two).
+    """
+    result = {'imported': 0, 'rejected': 0, 'batches': 0, 'errors': []}
+    if engine == 'pandas':
+        batches = _parse_chunks(file_stream, garden_id, batch_size, result)
+    elif engine == 'csv':
+        batches = _parse_rows(file_stream, garden_id, batch_size, result)
+    else:
+        raise ValueError(f'Unknown CSV import engine: {engine}')
+
+    try:
+        for batch in batches:
+            insert_batch(batch)
+            result['imported'] += len(batch)
+            result['batches'] += 1
+            if on_progress:
+                on_progress(result)
+    finally:
+        batches.close()
+
+    return result
+
+def _reject(result, line_number, reason):
+    result['rejected'] += 1
+    if len(result['errors']) < MAX_REPORTED_ERRORS:
+        result['errors'].append(f'line {line_number}: {reason}')
+
+def _parse_rows(file_stream, garden_id, batch_size, result):
+    text_stream = io.TextIOWrapper(file_stream, encoding='utf-8-sig', newline='')
+    try:
+        batch = []
+        reader = csv.DictReader(text_stream)
+        for row in reader:
+            try:
+                batch.append(parse_reading_row(row, garden_id))
+            except (ValueError, TypeError) as e:
+                _reject(result, reader.line_num, e)
+                continue
+
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+
+        if batch:
+            yield batch
+    finally:
+        # Leave the caller's stream open
+        text_stream.detach()
+
+# Bytes read from the upload at a time, and records handed to the C parser
+# at a time, by the pandas engine (batches are cut from these blocks)
+READ_BYTES = 1 << 20
+PARSE_BLOCK_ROWS = 50000
+NEWLINE, QUOTE, COMMA = ord('\n'), ord('"'), ord(',')
+
+def _record_blocks(file_stream, block_rows):
+    """Split a binary CSV stream into blocks of up to block_rows whole records.
+
+    Yields (data, starts, first_line): the block's bytes, the offset of
+    each record in it and the line number the block starts at. A record
+    ends at a newline preceded by an even number of quotes, so quoted line
+    breaks stay inside their record.
+    """
+    buffer, first_line, eof = b'', 1, False
+    while not eof:
+        data = file_stream.read(READ_BYTES)
+        eof = not data
+        buffer += data
+        if not eof and buffer.count(b'\n') <= block_rows:
+            continue
+
+        raw = np.frombuffer(buffer, dtype=np.uint8)
+        ends = np.flatnonzero(raw == NEWLINE)
+        if b'"' in buffer:
+            ends = ends[np.cumsum(raw == QUOTE)[ends] % 2 == 0]
+        ends += 1
+        if eof and len(buffer) and (not len(ends) or ends[-1] < len(buffer)):
+            # The last record need not end with a newline
+            ends = np.append(ends, len(buffer))
+
+        # Whole blocks only until the end of the stream; the rest waits for more data
+        start = 0
+        while len(ends) >= block_rows or (eof and len(ends)):
+            block, ends = ends[:block_rows], ends[block_rows:]
+            cut = int(block[-1])
+            yield buffer[start:cut], np.concatenate(([start], block[:-1])) - start, first_line
+            first_line += buffer.count(b'\n', start, cut)
+            start = cut
+        buffer = buffer[start:]
+
+def _counts_between(mask, starts):
+    """How many True values of mask fall in each range from one start to the next (or the end)."""
+    return np.add.reduceat(mask.view(np.uint8), starts).astype(np.int64)
+
+def _split_header(blocks):
+    """Take the header record off the first block; returns (header, names, blocks)."""
+    data, starts, first_line = next(blocks)
+    end = int(starts[1]) if len(starts) > 1 else len(data)
+    header = data[:end]
+    if header.startswith(codecs.BOM_UTF8):
+        header = header[len(codecs.BOM_UTF8):]
+    if not header.endswith(b'\n'):
+        header += b'\n'
+    names = next(csv.reader([header.decode('utf-8')]), [])
+    if len(starts) > 1:
+        blocks = itertools.chain([(data[end:], starts[1:] - end, first_line + data.count(b'\n', 0, end))],
+                                 blocks)
+    return header, names, blocks
+
+def _scan_records(data, starts, first_line, expected_fields):
+    """Vectorised pass over one block's bytes.
+
+    Returns the block without its blank and malformed records, the line
+    number of each record kept, and (line number, reason) for each record
+    cut out as malformed: more fields than expected_fields, or a quoted
+    field still open at the end of the file.
+    """
+    raw = np.frombuffer(data, dtype=np.uint8)
+    ends = np.append(starts[1:], len(data))
+    fields = _counts_between(raw == COMMA, starts) + 1
+    malformed = {}  # position -> reason
+    if b'"' in data:
+        # Quoted fields may hold commas and line breaks; only these records
+        # are counted field by field
+        newlines = _counts_between(raw == NEWLINE, starts)
+        lines = first_line + np.cumsum(newlines) - newlines
+        quotes = _counts_between(raw == QUOTE, starts)
+        for position in np.flatnonzero(quotes):
+            if quotes[position] % 2:
+                malformed[position] = 'unterminated quoted field'
+                continue
+            record = data[starts[position]:ends[position]].decode('utf-8')
+            fields[position] = len(next(csv.reader([record]), []))
+    else:
+        lines = first_line + np.arange(len(starts))
+    # Only a record without a comma can be blank
+    blank = np.zeros(len(starts), dtype=bool)
+    for position in np.flatnonzero(fields == 1):
+        blank[position] = not data[starts[position]:ends[position]].strip()
+    for position in np.flatnonzero((fields > expected_fields) & ~blank):
+        malformed.setdefault(position, f'expected {expected_fields} fields, saw {fields[position]}')
+
+    if not malformed:
+        return data, lines[~blank], []
+    # Keep the bytes around the records cut out; the C parser skips blank ones itself
+    cut = sorted(malformed)
+    bounds = [0, *itertools.chain.from_iterable((starts[position], ends[position]) for position in cut), len(data)]
+    data = b''.join(data[bounds[index]:bounds[index + 1]] for index in range(0, len(bounds), 2))
+    kept = ~blank
+    kept[cut] = False
+    return data, lines[kept], [(int(lines[position]), malformed[position]) for position in cut]
+
+def _parse_chunks(file_stream, garden_id, batch_size, result):
+    # Records are split off the upload in blocks and each block goes
+    # through the C parser. Field counts, blank records and line numbers
+    # come from a vectorised pass over the block's bytes. A record with
+    # more fields than the header is cut out of the block and rejected with
+    # its line number: the C parser would raise for it, or silently
+    # truncate it when it starts a chunk, and the python parser that can
+    # report it is much slower.
+    blocks = _record_blocks(file_stream, max(batch_size, PARSE_BLOCK_ROWS))
+    try:
+        header, names, blocks = _split_header(blocks)
+    except StopIteration:
+        return
+    # Only reading columns are parsed; every column when none is
+    # recognised, so the rows are still there to be validated
+    usecols = [name for name in names if name in READ_COLUMNS] or None
+    columns = None
+
+    for data, starts, first_line in blocks:
+        data, lines, rejects = _scan_records(data, starts, first_line, len(names))
+        valid = np.zeros(0, dtype=np.int64)
+        if len(lines):
+            chunk = _read_block(header + data, usecols)
+            if len(chunk) != len(lines):
+                raise ValueError(f'CSV parser read {len(chunk)} rows from the {len(lines)} '
+                                 f'records starting at line {lines[0]}')
+            if columns is None:
+                # Aliases are resolved once per file, not per row
+                columns = resolve_columns(chunk.columns)
+
+            values, invalid = _convert_chunk(chunk, columns)
+            rejects += [(int(lines[position]), position) for position in np.flatnonzero(invalid)]
+            valid = np.flatnonzero(~invalid)
+
+        for line_number, reason in sorted(rejects, key=lambda reject: reject[0]):
+            if not isinstance(reason, str) and len(result['errors']) < MAX_REPORTED_ERRORS:
+                # Only rows that make it into the error sample are described
+                reason = _invalid_reason(chunk.iloc[reason], columns)
+            _reject(result, line_number, reason)
+
+        fields = [*values, 'garden_id', 'is_manual'] if len(valid) else []
+        for first in range(0, len(valid), batch_size):
+            taken = valid[first:first + batch_size]
+            # tolist() hands back native floats/datetimes and None for the
+            # object arrays, which is what the bulk insert wants
+            rows = zip(*(values[field][taken].tolist() for field in values),
+                       itertools.repeat(garden_id), itertools.repeat(True))
+            yield list(map(dict, map(zip, itertools.repeat(fields), rows)))
+
+# Reading columns are parsed as floats by the C parser; a block with a
+# malformed number is read again with them as text for the vectorised checks
+NUMERIC_COLUMN_DTYPES = {
+    column: 'float64' for field in (*REQUIRED_NUMERIC, *OPTIONAL_NUMERIC) for column in COLUMN_ALIASES[field]
+}
+READ_COLUMNS = frozenset(column for aliases in COLUMN_ALIASES.values() for column in aliases)
+
+def _read_block(data, usecols):
+    options = dict(engine='c', encoding='utf-8', keep_default_na=False, na_values=[''], usecols=usecols)
+    try:
+        return pd.read_csv(io.BytesIO(data), dtype={**TEXT_COLUMN_DTYPES, **NUMERIC_COLUMN_DTYPES}, **options)
+    except ValueError:
+        return pd.read_csv(io.BytesIO(data), dtype=str, **options)
+
+def _convert_chunk(chunk, columns):
+    """Vectorised parse of one chunk; returns ({field: ndarray}, invalid row mask)."""
+    size = len(chunk)
+    values = {}
+    invalid = np.zeros(size, dtype=bool)
+
+    source = columns['timestamp']
+    raw = chunk[source] if source else pd.Series(np.nan, index=chunk.index, dtype=object)
+    timestamps = pd.to_datetime(raw, format='ISO8601', utc=True, errors='coerce')
+    invalid |= (timestamps.isna() & raw.notna()).to_numpy()
+    # Rows without a timestamp are stamped with the import time, as before
+    timestamps = timestamps.dt.tz_localize(None).fillna(pd.Timestamp(datetime.utcnow()))
+    values['timestamp'] = timestamps.dt.to_pydatetime()
+
+    for field in REQUIRED_NUMERIC:
+        source = columns[field]
+        if source:
+            numbers = pd.to_numeric(chunk[source], errors='coerce').to_numpy(dtype=float)
+            invalid |= np.isnan(numbers)
+        else:
+            numbers = np.zeros(size)
+        values[field] = numbers
+
+    for field in OPTIONAL_NUMERIC:
+        source = columns[field]
+        numbers = np.full(size, None, dtype=object)
+        if source:
+            parsed = pd.to_numeric(chunk[source], errors='coerce').to_numpy(dtype=float)
+            present = chunk[source].notna().to_numpy()
+            invalid |= present & np.isnan(parsed)
+            numbers[present] = parsed[present]
+        values[field] = numbers
+
+    values['notes'] = (chunk[columns['notes']].fillna('').to_numpy(dtype=object)
+                       if columns['notes'] else np.full(size, '', dtype=object))
+    return values, invalid
+
+def _invalid_reason(row, columns):
+    """Describe why a row failed the vectorised checks (only used for the error sample)."""
+    values = {columns[field]: row[columns[field]] for field in COLUMN_ALIASES if columns[field]}
+    try:
+        parse_reading_row({column: '' if pd.isna(value) else str(value)
+                           for column, value in values.items()}, None)
+    except (ValueError, TypeError) as e:
+        return str(e)
+    return 'invalid value'
+
+def export_readings(rows, compress=False, flush_every=500):
+    """Stream readings as CSV, yielding encoded chunks.
+
+    rows is any iterable of tuples in EXPORT_COLUMNS order -- typically a
+    column query with yield_per() so the database hands rows over in batches.
+    Only flush_every rows are buffered at a time, and the header is yielded
+    before the first row is fetched. With compress=True the chunks form a
+    single gzip stream, sync-flushed so each chunk can be sent immediately.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # wbits=31 selects the gzip container rather than raw zlib
+    compressor = zlib.compressobj(wbits=31) if compress else None
+
+    def drain():
+        data = buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+        if compressor:
+            return compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        return data
+
+    writer.writerow(EXPORT_COLUMNS)
+    yield drain()
+
+    for count, row in enumerate(rows, 1):
+        timestamp = row[0]
+        writer.writerow([timestamp.isoformat() if timestamp else None, *row[1:]])
+        if count % flush_every == 0:
+            yield drain()
+
+    tail = drain()
+    if compressor:
+        tail += compressor.flush()
+    if tail:
+        yield tail
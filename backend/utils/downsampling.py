@@ -0,0 +1,45 @@
+# Shape-preserving downsampling of reading series for charts
+import numpy as np
+
+def lttb_indices(x, y, threshold):
+    """Indices of the points Largest-Triangle-Three-Buckets keeps.
+
+    x must be increasing and neither array may contain NaN. The first and
+    last points are always kept; the points in between are split into
+    threshold - 2 equal buckets and from each bucket the point forming the
+    largest triangle with the previous pick and the next bucket's average is
+    kept, so spikes survive where plain decimation would drop them.
+    """
+    size = len(x)
+    if threshold >= size or threshold < 3:
+        return np.arange(size)
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+
+    # Bucket b covers [edges[b], edges[b + 1]); the last edge is the final point
+    edges = np.floor(np.arange(threshold - 1) * (size - 2) / (threshold - 2)).astype(int) + 1
+    edges[-1] = size - 1
+
+    # Every bucket's average, from prefix sums; the final point stands in as
+    # the "next bucket" of the last one
+    x_sums = np.concatenate(([0.0], np.cumsum(x)))
+    y_sums = np.concatenate(([0.0], np.cumsum(y)))
+    widths = np.diff(edges)
+    averages_x = np.append((x_sums[edges[1:]] - x_sums[edges[:-1]]) / widths, x[-1])
+    averages_y = np.append((y_sums[edges[1:]] - y_sums[edges[:-1]]) / widths, y[-1])
+
+    selected = np.empty(threshold, dtype=int)
+    selected[0] = 0
+    selected[-1] = size - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_x, next_y = averages_x[bucket + 1], averages_y[bucket + 1]
+        # Twice the triangle area; the constant factor does not change the argmax
+        areas = np.abs((x[previous] - next_x) * (y[start:end] - y[previous])
+                       - (x[previous] - x[start:end]) * (next_y - y[previous]))
+        previous = start + int(np.argmax(areas))
+        selected[bucket + 1] = previous
+
+    return selected
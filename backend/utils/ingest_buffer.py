@@ -0,0 +1,100 @@
+# Write-behind buffer that group-commits incoming readings
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+class IngestBuffer:
+    """Queue items in memory and hand them to flush(items) in groups.
+
+    A single flusher thread collects up to max_rows items, or whatever
+    arrived within max_delay seconds of the first one, and flushes them
+    together, so many writers share one transaction and one commit. submit()
+    returns a Future resolved when the item's group has been flushed (or
+    with the flush's exception); callers choose whether to wait on it. The
+    queue holds at most capacity items; submit() blocks up to timeout
+    seconds for room and then raises queue.Full, which is the backpressure
+    signal.
+    """
+
+    def __init__(self, flush, max_rows=500, max_delay=0.05, capacity=10000):
+        self.flush = flush
+        self.max_rows = max_rows
+        self.max_delay = max_delay
+        self._queue = queue.Queue(maxsize=capacity)
+        self._lock = threading.Lock()
+        self._counters = {
+            'enqueued': 0, 'rejected': 0, 'flushed': 0, 'failed': 0, 'flushes': 0,
+            'last_flush_ms': 0.0, 'max_flush_ms': 0.0, 'total_flush_ms': 0.0
+        }
+        self._thread = threading.Thread(target=self._run, name='ingest-flusher', daemon=True)
+        self._thread.start()
+
+    def submit(self, item, timeout=None):
+        future = Future()
+        try:
+            self._queue.put((item, future), timeout=timeout)
+        except queue.Full:
+            with self._lock:
+                self._counters['rejected'] += 1
+            raise
+        with self._lock:
+            self._counters['enqueued'] += 1
+        return future
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+        stats['queue_depth'] = self._queue.qsize()
+        stats['capacity'] = self._queue.maxsize
+        stats['mean_flush_ms'] = round(stats['total_flush_ms'] / stats['flushes'], 2) if stats['flushes'] else 0.0
+        return stats
+
+    def drain(self):
+        """Flush everything queued so far from the calling thread (used at shutdown)."""
+        while True:
+            group = self._collect(block=False)
+            if not group:
+                return
+            self._flush_group(group)
+
+    def _run(self):
+        while True:
+            self._flush_group(self._collect(block=True))
+
+    def _collect(self, block):
+        try:
+            group = [self._queue.get(block=block)]
+        except queue.Empty:
+            return []
+
+        deadline = time.monotonic() + self.max_delay
+        while len(group) < self.max_rows:
+            remaining = deadline - time.monotonic()
+            try:
+                group.append(self._queue.get(timeout=remaining) if block and remaining > 0
+                             else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return group
+
+    def _flush_group(self, group):
+        started = time.monotonic()
+        try:
+            self.flush([item for item, _ in group])
+        except Exception as e:
+            failed = True
+            for _, future in group:
+                future.set_exception(e)
+        else:
+            failed = False
+            for _, future in group:
+                future.set_result(True)
+
+        elapsed_ms = (time.monotonic() - started) * 1000
+        with self._lock:
+            self._counters['failed' if failed else 'flushed'] += len(group)
+            self._counters['flushes'] += 1
+            self._counters['last_flush_ms'] = round(elapsed_ms, 2)
+            self._counters['max_flush_ms'] = round(max(self._counters['max_flush_ms'], elapsed_ms), 2)
+            self._counters['total_flush_ms'] += elapsed_ms
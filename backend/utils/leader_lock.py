@@ -0,0 +1,97 @@
+# Leader election for work only one process may run at a time
+import os
+
+from sqlalchemy import text
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+class FileLeaderLock:
+    """Exclusive lock on a local file, for processes sharing one host.
+
+    acquire() never blocks: it returns False while another process holds
+    the lock. The operating system releases the lock when the holder exits,
+    however it exits, so a crashed leader cannot leave it stuck.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    def acquire(self):
+        if self._file:
+            return True
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        lock_file = open(self.path, 'a+')
+        try:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            lock_file.close()
+            return False
+        lock_file.seek(0)
+        lock_file.truncate()
+        lock_file.write(f'{os.getpid()}\n')
+        lock_file.flush()
+        self._file = lock_file
+        return True
+
+    def held(self):
+        return self._file is not None
+
+    def release(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+class AdvisoryLeaderLock:
+    """PostgreSQL session advisory lock, for processes on any number of hosts.
+
+    The lock lives on one dedicated connection kept open while it is held;
+    if that connection drops, the server releases the lock and held()
+    reports False so the leader can step down.
+    """
+
+    def __init__(self, engine, key):
+        self.engine = engine
+        self.key = key
+        self._connection = None
+
+    def acquire(self):
+        if self._connection:
+            return True
+        connection = self.engine.connect().execution_options(isolation_level='AUTOCOMMIT')
+        try:
+            acquired = connection.execute(text('SELECT pg_try_advisory_lock(:key)'), {'key': self.key}).scalar()
+        except Exception:
+            connection.close()
+            raise
+        if not acquired:
+            connection.close()
+            return False
+        self._connection = connection
+        return True
+
+    def held(self):
+        if not self._connection:
+            return False
+        try:
+            self._connection.execute(text('SELECT 1'))
+            return True
+        except Exception:
+            self._connection.invalidate()
+            self._connection = None
+            return False
+
+    def release(self):
+        if self._connection:
+            try:
+                self._connection.execute(text('SELECT pg_advisory_unlock(:key)'), {'key': self.key})
+            finally:
+                self._connection.close()
+                self._connection = None
@@ -0,0 +1,55 @@
+# Due-time scheduling of recurring per-key work
+import heapq
+import itertools
+
+class DueScheduler:
+    """Min-heap of keys ordered by the time they are next due.
+
+    schedule() replaces a key's previous due time in O(log n) by leaving
+    the old heap entry behind as stale; stale entries are skipped when they
+    surface. Times are plain numbers (e.g. time.monotonic()). Not thread
+    safe: one scheduler loop owns it.
+    """
+
+    def __init__(self):
+        self._heap = []  # (due, sequence, key)
+        self._due = {}  # key -> due of its live entry
+        self._sequence = itertools.count()
+
+    def __len__(self):
+        return len(self._due)
+
+    def __contains__(self, key):
+        return key in self._due
+
+    def schedule(self, key, due):
+        self._due[key] = due
+        heapq.heappush(self._heap, (due, next(self._sequence), key))
+
+    def remove(self, key):
+        self._due.pop(key, None)
+
+    def due_at(self, key):
+        return self._due.get(key)
+
+    def next_due(self):
+        """Earliest due time, or None when nothing is scheduled."""
+        self._drop_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now, limit=None):
+        """Remove and return up to limit (key, due) pairs due at or before now, earliest first."""
+        due_keys = []
+        while limit is None or len(due_keys) < limit:
+            self._drop_stale()
+            if not self._heap or self._heap[0][0] > now:
+                break
+            due, _, key = heapq.heappop(self._heap)
+            del self._due[key]
+            due_keys.append((key, due))
+        return due_keys
+
+    def _drop_stale(self):
+        heap = self._heap
+        while heap and self._due.get(heap[0][2]) != heap[0][0]:
+            heapq.heappop(heap)
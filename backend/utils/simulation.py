@@ -2,6 +2,8 @@
 import random
 from datetime import datetime
 
+import numpy as np
+
 def generate_reading(garden_settings):
     # ...simulate moisture, temperature, light, etc...
     return {
@@ -10,3 +12,151 @@ def generate_reading(garden_settings):
         'light_intensity': random.uniform(200, 1000),
         'timestamp': datetime.utcnow().isoformat()
     }
+
+# Vectorised sensor models. Each takes the previous value of every simulated
+# garden as a float array (NaN where a garden has no reading yet) and draws
+# the next value for all of them at once. Apart from light, a reading is the
+# previous one plus a random step, clipped to the sensor's range; the step
+# draws are shared with generate_history, which runs whole series at once.
+
+MOISTURE_RANGE = (0, 100)
+TEMPERATURE_RANGE = (5, 40)
+HUMIDITY_RANGE = (20, 100)
+PH_RANGE = (4.0, 8.0)
+# Share of the way each light reading moves towards its day or night target
+LIGHT_SMOOTHING = 0.3
+
+def moisture_steps(shape, rng):
+    """Gradual decline with some variation."""
+    return rng.uniform(-5, 5, shape) - rng.uniform(0.5, 2.0, shape)
+
+def temperature_steps(shape, rng):
+    return rng.uniform(-2, 2, shape)
+
+def humidity_steps(shape, rng):
+    return rng.uniform(-3, 3, shape)
+
+def ph_steps(shape, rng):
+    return rng.uniform(-0.1, 0.1, shape)
+
+def light_targets(hours, rng):
+    """Day/night target light level for each reading's hour (daytime is 06:00-18:59)."""
+    daytime = (hours >= 6) & (hours <= 18)
+    return np.where(daytime, rng.uniform(500, 1500, hours.shape), rng.uniform(0, 100, hours.shape))
+
+def light_noise(shape, rng):
+    return rng.uniform(-50, 50, shape)
+
+def generate_moisture_readings(previous, rng):
+    """Fresh gardens start at 40-80%."""
+    size = len(previous)
+    drifted = np.clip(previous + moisture_steps(size, rng), *MOISTURE_RANGE)
+    return np.where(np.isnan(previous), rng.uniform(40, 80, size), drifted)
+
+def generate_temperature_readings(previous, rng):
+    """Small variations around the previous reading; fresh gardens start at 18-25C."""
+    size = len(previous)
+    drifted = np.clip(previous + temperature_steps(size, rng), *TEMPERATURE_RANGE)
+    return np.where(np.isnan(previous), rng.uniform(18, 25, size), drifted)
+
+def generate_light_readings(previous, hours, rng):
+    """Day/night cycle keyed to each reading's hour.
+
+    Readings move LIGHT_SMOOTHING of the way towards the target light
+    level, so the transition between day and night is smooth.
+    """
+    target = light_targets(hours, rng)
+    smoothed = previous + (target - previous) * LIGHT_SMOOTHING + light_noise(len(previous), rng)
+    return np.where(np.isnan(previous), target, smoothed)
+
+def generate_humidity_readings(previous, rng):
+    size = len(previous)
+    drifted = np.clip(previous + humidity_steps(size, rng), *HUMIDITY_RANGE)
+    # A missing or zero previous humidity starts over, as the scalar model did
+    fresh = np.isnan(previous) | (previous == 0)
+    return np.where(fresh, rng.uniform(45, 75, size), drifted)
+
+def generate_ph_readings(previous, rng):
+    size = len(previous)
+    drifted = np.clip(previous + ph_steps(size, rng), *PH_RANGE)
+    fresh = np.isnan(previous) | (previous == 0)
+    return np.where(fresh, rng.uniform(6.0, 7.5, size), drifted)
+
+def generate_readings(previous, hours, rng=None):
+    """Next reading for every garden.
+
+    previous maps each reading column (moisture_level, temperature,
+    light_intensity, humidity, ph_level) to an array of last values; hours
+    is the hour of day the new readings are for. Returns the same keys
+    mapped to arrays of new values.
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    return {
+        'moisture_level': generate_moisture_readings(previous['moisture_level'], rng),
+        'temperature': generate_temperature_readings(previous['temperature'], rng),
+        'light_intensity': generate_light_readings(previous['light_intensity'], hours, rng),
+        'humidity': generate_humidity_readings(previous['humidity'], rng),
+        'ph_level': generate_ph_readings(previous['ph_level'], rng),
+    }
+
+# A reading that depends on the previous one is a running map applied down
+# the rows. Composing two clip(x + shift, low, high) maps, or two
+# keep * x + add maps, gives a map of the same form, so each series is a
+# prefix scan: log2(rows) whole-array passes instead of a loop over rows.
+
+def clipped_walk(start, steps, low, high):
+    """Running clip(previous + step, low, high) down the rows of steps, from start."""
+    shift = steps.copy()
+    lower = np.full(steps.shape, float(low))
+    upper = np.full(steps.shape, float(high))
+    offset = 1
+    while offset < len(steps):
+        later, earlier = slice(offset, None), slice(None, -offset)
+        # Each row's map composed after the one offset rows earlier
+        lower[later], upper[later] = (np.clip(lower[earlier] + shift[later], lower[later], upper[later]),
+                                      np.clip(upper[earlier] + shift[later], lower[later], upper[later]))
+        shift[later] += shift[earlier]
+        offset *= 2
+    return np.clip(start + shift, lower, upper)
+
+def smoothed_walk(start, inputs, keep):
+    """Running keep * previous + input down the rows of inputs, from start."""
+    add = inputs.copy()
+    scale = np.full(inputs.shape, float(keep))
+    offset = 1
+    while offset < len(inputs):
+        later, earlier = slice(offset, None), slice(None, -offset)
+        add[later] += scale[later] * add[earlier]
+        scale[later] *= scale[earlier]
+        offset *= 2
+    return scale * start + add
+
+def generate_history(previous, timestamps, rng=None):
+    """Readings for every garden at each of timestamps, continuing from previous.
+
+    The first row comes from generate_readings, which starts fresh gardens.
+    The random steps of all later rows are drawn as one block, and only the
+    running state is left to clipped_walk and smoothed_walk. The light
+    cycle is keyed to each timestamp's hour rather than the wall clock, so a
+    backfilled series behaves like one the simulator produced live. Returns
+    each column as a (len(timestamps), gardens) array; the last row is the
+    previous of a following call.
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    size = len(next(iter(previous.values())))
+    if not len(timestamps):
+        return {column: np.empty((0, size)) for column in previous}
+    hours = np.array([timestamp.hour for timestamp in timestamps])
+    first = generate_readings(previous, np.full(size, hours[0]), rng)
+    
+    shape = (len(timestamps) - 1, size)
+    light_inputs = light_targets(np.broadcast_to(hours[1:, None], shape), rng) * LIGHT_SMOOTHING + \
+        light_noise(shape, rng)
+    rest = {
+        'moisture_level': clipped_walk(first['moisture_level'], moisture_steps(shape, rng), *MOISTURE_RANGE),
+        'temperature': clipped_walk(first['temperature'], temperature_steps(shape, rng), *TEMPERATURE_RANGE),
+        'light_intensity': smoothed_walk(first['light_intensity'], light_inputs, 1 - LIGHT_SMOOTHING),
+        'humidity': clipped_walk(first['humidity'], humidity_steps(shape, rng), *HUMIDITY_RANGE),
+        'ph_level': clipped_walk(first['ph_level'], ph_steps(shape, rng), *PH_RANGE),
+    }
+    return {column: np.vstack([first[column][None], rest[column]]) for column in first}
@@ -0,0 +1,46 @@
+# Small in-process caches with per-entry expiry
+import threading
+import time
+from collections import OrderedDict
+
+class TTLCache:
+    """Thread-safe LRU mapping whose entries expire ttl seconds after being set.
+
+    Each process keeps its own copy, so invalidate() only reaches this
+    process; the TTL bounds how long another process can serve a stale entry.
+    """
+
+    def __init__(self, ttl=60, max_entries=10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.stats = {'hits': 0, 'misses': 0}
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """The cached value, or None when absent or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.stats['hits'] += 1
+                return entry[1]
+            if entry:
+                del self._entries[key]
+            self.stats['misses'] += 1
+            return None
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -1,10 +1,181 @@
 # Weather API logic
 import os
+import random
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
 import requests
+from requests.adapters import HTTPAdapter
+
+WEATHER_API_URL = 'http://api.weatherapi.com/v1/current.json'
+# (connect, read) seconds; an upstream that hangs must not hold a request thread
+DEFAULT_TIMEOUT = (3.05, 10)
+# Coordinates are rounded to this many decimals (~1 km) before caching
+COORDINATE_PRECISION = 2
+
+class WeatherApiProvider:
+    """Current weather from weatherapi.com (or anything serving the same API at base_url).
+
+    One pooled requests.Session is shared by every lookup, so connections to
+    the upstream are kept alive instead of reopened per call.
+    """
+
+    def __init__(self, api_key, base_url=WEATHER_API_URL, timeout=DEFAULT_TIMEOUT, pool_size=10):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def fetch(self, query):
+        response = self.session.get(self.base_url, params={'key': self.api_key, 'q': query},
+                                    timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+class SimulatedWeatherProvider:
+    """Random weather for development and demos; needs no API key."""
+
+    def fetch(self, query):
+        weather_conditions = ['sunny', 'cloudy', 'rainy', 'partly cloudy', 'overcast']
+        return {
+            'name': query,
+            'main': {
+                'temp': round(15 + random.random() * 20, 1),
+                'humidity': round(40 + random.random() * 40),
+                'pressure': round(1000 + random.random() * 50)
+            },
+            'weather': [{
+                'main': random.choice(['Clear', 'Clouds', 'Rain']),
+                'description': random.choice(weather_conditions)
+            }],
+            'wind': {
+                'speed': round(random.random() * 10, 1)
+            },
+            'visibility': round(8000 + random.random() * 2000),
+            'simulated': True
+        }
+
+def weather_query(location=None, lat=None, lon=None):
+    """Normalised lookup key: rounded 'lat,lon' when coordinates are given, else the location name."""
+    if lat is not None and lon is not None:
+        return f'{round(float(lat), COORDINATE_PRECISION)},{round(float(lon), COORDINATE_PRECISION)}'
+    if location and location.strip():
+        return ' '.join(location.split()).lower()
+    raise ValueError('A location or both lat and lon are required')
+
+class WeatherClient:
+    """Provider lookups behind an LRU cache with a TTL and single-flight coalescing.
+
+    Concurrent lookups of the same key while it is being fetched wait for
+    that one upstream call instead of issuing their own. Failed lookups are
+    not cached.
+    """
+
+    def __init__(self, provider, ttl=600, max_entries=1024):
+        self.provider = provider
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.stats = {'hits': 0, 'misses': 0, 'coalesced': 0}
+        self._entries = OrderedDict()  # query -> (expires_at, weather)
+        self._in_flight = {}  # query -> Future
+        self._lock = threading.Lock()
+
+    def current(self, location=None, lat=None, lon=None):
+        return self.get(weather_query(location, lat, lon))
+
+    def get(self, query, refresh=False):
+        """Weather for a normalised query; refresh=True skips the cached entry (but still coalesces)."""
+        with self._lock:
+            entry = self._entries.get(query)
+            if entry and entry[0] > time.monotonic() and not refresh:
+                self._entries.move_to_end(query)
+                self.stats['hits'] += 1
+                return entry[1]
+
+            flight = self._in_flight.get(query)
+            leader = flight is None
+            if leader:
+                flight = self._in_flight[query] = Future()
+                self.stats['misses'] += 1
+            else:
+                self.stats['coalesced'] += 1
+
+        if not leader:
+            return flight.result()
+
+        try:
+            weather = self.provider.fetch(query)
+        except Exception as e:
+            flight.set_exception(e)
+            raise
+        else:
+            self._store(query, weather)
+            flight.set_result(weather)
+            return weather
+        finally:
+            with self._lock:
+                del self._in_flight[query]
+
+    def _store(self, query, weather):
+        with self._lock:
+            self._entries[query] = (time.monotonic() + self.ttl, weather)
+            self._entries.move_to_end(query)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+def prefetch_weather(client, coordinates, max_workers=8):
+    """Refresh the cached weather of every cell the (lat, lon) pairs fall into.
+
+    Nearby coordinates share a cell (the rounding weather_query applies), so
+    each cell is fetched once; cells are fetched concurrently, at most
+    max_workers at a time. Returns counts of cells fetched and failed.
+    """
+    cells = {weather_query(lat=lat, lon=lon) for lat, lon in coordinates}
+    result = {'cells': len(cells), 'fetched': 0, 'failed': 0}
+
+    def refresh(cell):
+        try:
+            client.get(cell, refresh=True)
+            return True
+        except Exception:
+            return False
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='weather-prefetch') as executor:
+        for fetched in executor.map(refresh, cells):
+            result['fetched' if fetched else 'failed'] += 1
+    return result
+
+WEATHER_PROVIDERS = ('simulated', 'weatherapi')
+
+def create_weather_client(provider='weatherapi', api_key=None, base_url=None, ttl=600,
+                          max_entries=1024, timeout=DEFAULT_TIMEOUT):
+    """WeatherClient for one of WEATHER_PROVIDERS.
+
+    base_url lets a local stub server stand in for weatherapi.com in tests
+    and benchmarks.
+    """
+    if provider == 'weatherapi':
+        source = WeatherApiProvider(api_key, base_url or WEATHER_API_URL, timeout)
+    elif provider == 'simulated':
+        source = SimulatedWeatherProvider()
+    else:
+        raise ValueError(f'Unknown weather provider: {provider}')
+    return WeatherClient(source, ttl, max_entries)
+
+_default_client = None
 
 def get_current_weather(location):
-    api_key = os.getenv('WEATHER_API_KEY')
-    url = f"http://api.weatherapi.com/v1/current.json?key={api_key}&q={location}"
-    response = requests.get(url)
-    response.raise_for_status()
-    return response.json()
+    global _default_client
+    if _default_client is None:
+        _default_client = create_weather_client(api_key=os.getenv('WEATHER_API_KEY'),
+                                                base_url=os.getenv('WEATHER_API_URL'))
+    return _default_client.current(location)
@@ -0,0 +1,50 @@
+# Shared app fixtures: a throwaway database, a logged-in client and a seeded garden
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+import pytest
+
+# TEST_DATABASE_URL runs the suite against another server, e.g. PostgreSQL
+os.environ['DATABASE_URL'] = os.environ.get('TEST_DATABASE_URL') or \
+    'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'test.db')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as backend  # noqa: E402
+
+SEEDED_READINGS = 500
+
+@pytest.fixture(scope='session')
+def app():
+    backend.app.config['TESTING'] = True
+    return backend.app
+
+@pytest.fixture(scope='session')
+def client(app):
+    client = app.test_client()
+    credentials = {'username': 'pytest-user', 'password': 'secret1'}
+    client.post('/api/register', json=credentials)
+    assert client.post('/api/login', json=credentials).status_code == 200
+    return client
+
+@pytest.fixture(scope='session')
+def garden_id(app, client):
+    """A simulated garden with SEEDED_READINGS minutely readings, written the way the app writes them."""
+    garden_id = client.post('/api/gardens', json={'name': 'seeded', 'sensor_type': 'simulated_full'})\
+                      .get_json()['garden']['id']
+    start = datetime.utcnow() - timedelta(minutes=SEEDED_READINGS)
+    with app.app_context():
+        backend.insert_readings([
+            {'garden_id': garden_id, 'timestamp': start + timedelta(minutes=minute),
+             'moisture_level': 80 - minute * 0.05, 'temperature': 20.0, 'light_intensity': 500.0,
+             'humidity': 55.0, 'ph_level': 6.5, 'is_manual': False}
+            for minute in range(SEEDED_READINGS)
+        ])
+        backend.db.session.commit()
+        if backend.db.engine.dialect.name == 'postgresql':
+            # Plan against the seeded rows, as autovacuum would, not an empty-table estimate
+            with backend.db.engine.connect() as connection:
+                connection.execution_options(isolation_level='AUTOCOMMIT').execute(
+                    backend.db.text('ANALYZE plant_readings'))
+    return garden_id
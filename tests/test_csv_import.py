@@ -0,0 +1,54 @@
+# The pandas import engine must accept and reject the same rows as the csv engine
+import io
+
+import pytest
+
+from backend.utils import csv_handler
+
+HEADER = 'timestamp,moisture_level,temperature,light_intensity,notes\n'
+
+def run_import(text, engine, batch_size=2):
+    batches = []
+    result = csv_handler.import_readings(io.BytesIO(text.encode('utf-8')), 1, batches.append,
+                                         batch_size=batch_size, engine=engine)
+    return result, [reading for batch in batches for reading in batch]
+
+@pytest.fixture(autouse=True)
+def small_blocks(monkeypatch):
+    # Several parse blocks and reads even for a short file
+    monkeypatch.setattr(csv_handler, 'PARSE_BLOCK_ROWS', 3)
+    monkeypatch.setattr(csv_handler, 'READ_BYTES', 32)
+
+def test_engines_agree_on_quoted_and_blank_records():
+    text = ('﻿' + HEADER.replace('\n', '\r\n') +
+            '2025-01-01T00:00:00Z,10,20,300,"a, b"\r\n'
+            '\r\n'
+            '2025-01-01T01:00:00,11,20,300,"two\r\nlines"\r\n'
+            '2025-01-01T02:00:00,x,20,300,\r\n'
+            '2025-01-01T03:00:00,13,20,300,"say ""hi"""\r\n'
+            '2025-01-01T04:00:00,14,20,300,last')
+    csv_result, csv_rows = run_import(text, 'csv')
+    pandas_result, pandas_rows = run_import(text, 'pandas')
+
+    assert [row['moisture_level'] for row in pandas_rows] == [10.0, 11.0, 13.0, 14.0]
+    assert [row['notes'] for row in pandas_rows] == [row['notes'] for row in csv_rows]
+    assert [row['timestamp'] for row in pandas_rows] == [row['timestamp'] for row in csv_rows]
+    assert pandas_result['rejected'] == csv_result['rejected'] == 1
+    assert pandas_result['errors'][0].startswith('line 6:')
+
+def test_pandas_engine_rejects_overlong_and_unterminated_records():
+    text = (HEADER +
+            '2025-01-01T00:00:00,1,20,300,a\n'
+            '2025-01-01T00:00:00,2,20,300,b\n'
+            '2025-01-01T00:00:00,3,20,300,c\n'
+            '2025-01-01T00:00:00,4,20,300,d,extra\n'
+            '2025-01-01T00:00:00,5,20,300,e\n'
+            '2025-01-01T00:00:00,6,20,300,"open\n')
+    result, rows = run_import(text, 'pandas')
+
+    assert [row['moisture_level'] for row in rows] == [1.0, 2.0, 3.0, 5.0]
+    assert result['errors'] == ['line 5: expected 5 fields, saw 6', 'line 7: unterminated quoted field']
+
+def test_pandas_engine_handles_empty_and_header_only_files():
+    assert run_import('', 'pandas')[0]['imported'] == 0
+    assert run_import(HEADER, 'pandas')[0]['imported'] == 0
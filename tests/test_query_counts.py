@@ -0,0 +1,23 @@
+# Queries per request on the warm read routes, from the X-Query-Count header
+import pytest
+
+@pytest.fixture(autouse=True)
+def query_count_header(app, monkeypatch):
+    monkeypatch.setitem(app.config, 'QUERY_COUNT_HEADER', True)
+
+def query_count(client, path):
+    response = client.get(path)
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return int(response.headers['X-Query-Count'])
+
+@pytest.mark.parametrize('path, expected', [
+    ('/api/profile', 0),
+    ('/api/gardens', 1),
+    ('/api/gardens/{garden_id}/readings?limit=10', 1),
+    ('/api/gardens/{garden_id}/readings/aggregate?bucket=1h', 1),
+    ('/api/gardens/{garden_id}/prediction', 1),
+])
+def test_warm_read_route_query_count(client, garden_id, path, expected):
+    path = path.format(garden_id=garden_id)
+    query_count(client, path)  # warms the user, ownership and route caches
+    assert query_count(client, path) == expected
@@ -0,0 +1,24 @@
+# Hot readings queries must be served by the (garden_id, timestamp, id) index
+import pytest
+
+import app as backend
+
+@pytest.mark.parametrize('name', [
+    'get_garden_readings',
+    'get_garden_readings_by_cursor',
+    'export_garden_data',
+    'get_prediction',
+    'latest_reading',
+    'simulation_tick',
+    'retention_cutoff',
+    'retention_delete',
+])
+def test_hot_query_avoids_full_scan_and_sort(app, garden_id, name):
+    with app.app_context():
+        try:
+            red_flags = backend.QUERY_PLAN_RED_FLAGS[backend.db.engine.dialect.name]
+            plan = backend.explain_query(backend.hot_reading_queries(garden_id)[name])
+        finally:
+            backend.db.session.rollback()
+    flagged = [line for line in plan if any(flag in line for flag in red_flags)]
+    assert not flagged, '\n'.join(plan)